@@ -1,8 +1,140 @@
-from flask import Flask, request, render_template
-from src.pipelines.predict_pipeline import CustomData, PredictPipeline
+import gc
+import io
+import os
+import time
+import threading
+from flask import Flask, Response, g, request, render_template, jsonify
+from src.pipelines.predict_pipeline import (
+    CustomData, CustomBatchData, PredictPipeline,
+    get_health_status, get_health_status_array
+)
+from src.pipelines.stream_pipeline import StreamPipeline, EngineWindowStore, StreamPipelineConfig
+from src.pipelines.shared_state import SharedObject
+from src.pipelines.batch_scheduler import MicroBatchScheduler, MicroBatchConfig
+from src.pipelines.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipelines.fleet_index import FleetHealthIndex, FleetIndexConfig
+from src.metrics import STAGE_LATENCY, REQUEST_LATENCY, time_stage, render_prometheus
+from src.profiler import SamplingProfiler
+from src.logger import logging
 
 app = Flask(__name__)
 
+# Upper bound on rows per /predict/batch call (fleet dashboard refreshes)
+app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+
+# When set, any request with ?profile=1 is sampled and its folded stacks are
+# written to artifacts/profiles/ (path returned in the X-Profile-File header)
+app.config['PROFILING_ENABLED'] = os.environ.get('ENABLE_PROFILING') == '1'
+# runtime="auto" loads the native booster (and xgboost) for batches above
+# compiled_max_rows lazily in each worker. With PRELOAD_NATIVE=1 the gunicorn
+# master loads it before forking, so all workers share one copy.
+app.config['PRELOAD_NATIVE'] = os.environ.get('PRELOAD_NATIVE') == '1'
+
+# One pipeline per worker process: the model registry behind it loads the
+# pickles on first use and hot-reloads them when train_pipeline.py rewrites them.
+# Form/batch inputs are resubmitted a lot, so their predictions are cached
+# per model version (invalidated automatically on retrain).
+# PREDICTION_CACHE_SIZE=0 turns it off (benchmarks/bench_service.py does).
+prediction_cache = PredictionCache(PredictionCacheConfig(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+    decimals=int(os.environ.get('PREDICTION_CACHE_DECIMALS', 4)),
+))
+predict_pipeline = PredictPipeline(cache=prediction_cache if prediction_cache.cache_config.max_entries else None)
+
+# Per-engine rolling windows for live telemetry. Consecutive cycles of one
+# engine land on different gunicorn workers, so the windows live in one
+# state-server process all workers share (src/pipelines/shared_state.py,
+# started by gunicorn.conf.py); under `python app.py` they are in-process.
+# Rolling features rarely repeat, so this path bypasses the prediction cache.
+engine_windows = SharedObject("engine_windows", EngineWindowStore, StreamPipelineConfig())
+stream_pipeline = StreamPipeline(predict_pipeline=PredictPipeline(), windows=engine_windows)
+
+# Concurrent single-engine form posts (gthread workers, see gunicorn.conf.py)
+# are coalesced into one transform + predict per micro-batch
+batch_scheduler = MicroBatchScheduler(predict_pipeline.predict, MicroBatchConfig(
+    max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64)),
+    max_wait_ms=float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', 2.0)),
+))
+
+# Latest RUL per unit_nr from batch and stream scoring, sorted for the
+# maintenance planners' fleet queries. Shared by all workers like the stream
+# windows, so every query sees every scored engine
+fleet_index = SharedObject("fleet_index", FleetHealthIndex, FleetIndexConfig(
+    max_units=int(os.environ.get('FLEET_INDEX_MAX_UNITS', 100000)),
+))
+
+# --- PRELOAD + READINESS ---
+# gunicorn.conf.py calls preload_model() in the master before forking and
+# warm_up() in every worker once it has booted; /ready reports the latter.
+_warmup_lock = threading.Lock()
+readiness = {"ready": False, "pid": None, "version": None, "warmup_seconds": None, "error": None}
+
+def preload_model():
+    """
+    Loads the served model once in the gunicorn master (plus the native
+    booster behind large batches with PRELOAD_NATIVE=1). Compiled arrays are
+    memory-mapped read-only (ModelRegistryConfig.mmap_mode), and gc.freeze()
+    keeps the collector from touching the inherited objects, so forked
+    workers share these pages instead of each holding a copy.
+    """
+    start = time.perf_counter()
+    predict_pipeline.registry.get()
+    if app.config['PRELOAD_NATIVE']:
+        predict_pipeline.registry.load_native_runtime()
+    gc.freeze()
+    stats = predict_pipeline.registry.stats()
+    logging.info(f"Preloaded model version {stats['version']} ({stats['runtime']} runtime, "
+                 f"native loaded: {stats.get('native_loaded', stats['runtime'] == 'native')}) "
+                 f"in {time.perf_counter() - start:.4f}s")
+
+def warm_up():
+    """
+    Dummy predictions (the scaler's mean row) in this process, so the first
+    real request pays no first-call cost. A single row stays on the compiled
+    runtime under "auto": warm-up never loads the native booster, so workers
+    only import xgboost for their first large batch (unless the master
+    preloaded it). Runs after the fork: XGBoost's OpenMP pool must not be
+    started in the master. Returns whether this worker is ready; a failure
+    is kept and retried on /ready.
+    """
+    with _warmup_lock:
+        if readiness["ready"] and readiness["pid"] == os.getpid():
+            return True
+        try:
+            start = time.perf_counter()
+            model, preprocessor, _, version = predict_pipeline.registry.get_array_path()
+            row = preprocessor.transform(preprocessor.mean[None, :])
+            model.predict(row)
+            interval_model = predict_pipeline.registry.get_interval_path()[0]
+            if interval_model is not None:
+                interval_model.predict_interval(row)
+            readiness.update(ready=True, pid=os.getpid(), version=version,
+                             warmup_seconds=time.perf_counter() - start, error=None)
+            logging.info(f"Worker {os.getpid()} warmed up in {readiness['warmup_seconds']:.4f}s")
+        except Exception as e:
+            readiness.update(ready=False, pid=os.getpid(), error=str(e))
+            logging.info(f"Warm-up failed in worker {os.getpid()}: {e}")
+        return readiness["ready"]
+
+# --- INSTRUMENTATION ---
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if app.config['PROFILING_ENABLED'] and request.args.get('profile') == '1':
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request_latency(response):
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - g.request_start)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-File'] = profiler.stop().write(endpoint)
+    return response
+
 # --- ROUTES ---
 
 @app.route('/')
@@ -22,43 +154,34 @@ def predict_datapoint():
     if request.method == 'GET':
         return render_template('home.html')
     else:
-        data = CustomData(
-            s_2 = float(request.form.get('s_2')),
-            s_3 = float(request.form.get('s_3')),
-            s_4 = float(request.form.get('s_4')),
-            s_7 = float(request.form.get('s_7')),
-            s_11 = float(request.form.get('s_11')),
-            s_12 = float(request.form.get('s_12')),
-            s_15 = float(request.form.get('s_15')),
-            s_17 = float(request.form.get('s_17')),
-            s_20 = float(request.form.get('s_20')),
-            s_21 = float(request.form.get('s_21'))
-        )
+        with time_stage("form_parse"):
+            data = CustomData(
+                s_2 = float(request.form.get('s_2')),
+                s_3 = float(request.form.get('s_3')),
+                s_4 = float(request.form.get('s_4')),
+                s_7 = float(request.form.get('s_7')),
+                s_11 = float(request.form.get('s_11')),
+                s_12 = float(request.form.get('s_12')),
+                s_15 = float(request.form.get('s_15')),
+                s_17 = float(request.form.get('s_17')),
+                s_20 = float(request.form.get('s_20')),
+                s_21 = float(request.form.get('s_21'))
+            )
         
-        pred_df = data.get_data_as_dataframe()
+        # One NumPy row in the model's feature layout (no DataFrame)
+        with time_stage("build_features"):
+            pred_row = data.get_data_as_array()[0]
         print("User Input received...")
 
-        predict_pipeline = PredictPipeline()
-        pred = predict_pipeline.predict(pred_df)
+        pred = [batch_scheduler.predict(pred_row)]
         
         # --- NEW LOGIC: DETERMINE HEALTH STATUS ---
         rul = round(pred[0], 2)
-        
-        if rul > 150:
-            status = "HEALTHY"
-            msg = "Optimal Operations"
-            color = "success" # Green
-            icon = "fa-check-circle"
-        elif rul > 50:
-            status = "DEGRADATION"
-            msg = "Fault Propagation Detected"
-            color = "warning" # Yellow/Orange
-            icon = "fa-exclamation-triangle"
-        else:
-            status = "FAILURE IMMINENT"
-            msg = "System Termination Risk"
-            color = "danger" # Red
-            icon = "fa-radiation"
+        health = get_health_status(rul)
+        status = health["status"]
+        msg = health["msg"]
+        color = health["color"]
+        icon = health["icon"]
 
         return render_template('home.html', 
                                results=rul, 
@@ -66,6 +189,171 @@ def predict_datapoint():
                                msg=msg, 
                                color=color, 
                                icon=icon)
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Scores many engines in one call.
+    Accepts a JSON array of {s_2, ..., s_21[, unit_nr]} objects, or a CSV
+    (multipart field 'file' or a text/csv body) with the same columns.
+    When the model has quantile heads, each row also gets rul_lower/rul_upper.
+    """
+    try:
+        with time_stage("batch_parse"):
+            if 'file' in request.files:
+                data = CustomBatchData.from_csv(request.files['file'].stream)
+            elif request.mimetype == 'text/csv':
+                data = CustomBatchData.from_csv(io.BytesIO(request.get_data()))
+            else:
+                data = CustomBatchData.from_records(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    max_batch_size = app.config['MAX_BATCH_SIZE']
+    if len(data) > max_batch_size:
+        return jsonify({"error": f"Batch of {len(data)} rows exceeds the limit of {max_batch_size}"}), 413
+
+    # One feature matrix -> one transform + one predict for the whole batch
+    # (point RUL and quantile bounds come out of the same forest traversal)
+    with time_stage("build_features"):
+        features = data.get_data_as_array()
+    preds, lower, upper = predict_pipeline.predict_interval(features)
+    preds = preds.astype(float).round(2)
+    statuses = get_health_status_array(preds)
+
+    if data.unit_ids is not None:
+        fleet_index.update(data.unit_ids, preds)
+
+    if lower is not None:
+        lower, upper = lower.astype(float).round(2), upper.astype(float).round(2)
+        # The status could change within the interval (e.g. RUL 49-51 straddles a band)
+        uncertain = get_health_status_array(lower) != get_health_status_array(upper)
+
+    predictions = []
+    for i in range(len(data)):
+        row = {"rul": float(preds[i]), "status": str(statuses[i])}
+        if lower is not None:
+            row.update({"rul_lower": float(lower[i]), "rul_upper": float(upper[i]),
+                        "status_uncertain": bool(uncertain[i])})
+        if data.unit_ids is not None:
+            row["unit_nr"] = data.unit_ids[i]
+        predictions.append(row)
+
+    return jsonify({"count": len(predictions), "predictions": predictions})
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Live telemetry: one cycle of readings per unit_nr (object or array).
+    Rolling mean/std/slope come from the engine's last cycles, not from
+    the steady-state assumption used by the form.
+    """
+    try:
+        units, values = StreamPipeline.parse_readings(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    max_batch_size = app.config['MAX_BATCH_SIZE']
+    if len(units) > max_batch_size:
+        return jsonify({"error": f"Batch of {len(units)} rows exceeds the limit of {max_batch_size}"}), 413
+
+    preds, cycles, statuses = stream_pipeline.update_and_predict(units, values)
+    fleet_index.update(units, preds)
+    predictions = [
+        {"unit_nr": unit, "cycles_seen": cycles[i], "rul": float(preds[i]), "status": str(statuses[i])}
+        for i, unit in enumerate(units)
+    ]
+    return jsonify({"count": len(predictions), "predictions": predictions})
+
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    return default if value is None else int(value)
+
+def _float_arg(name):
+    value = request.args.get(name)
+    return None if value is None else float(value)
+
+@app.route('/fleet/top')
+def fleet_top():
+    """
+    The k engines closest to failure (?k=50), or the healthiest with ?order=highest.
+    """
+    try:
+        k = _int_arg('k', 50)
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    lowest = request.args.get('order', 'lowest') != 'highest'
+    engines = fleet_index.top_k(k, lowest=lowest)
+    return jsonify({"count": len(engines), "engines": engines})
+
+@app.route('/fleet/band/<status>')
+def fleet_band(status):
+    """
+    Engines in one status band (HEALTHY, DEGRADATION, FAILURE_IMMINENT), lowest RUL first.
+    """
+    try:
+        total, engines = fleet_index.band(status.upper().replace('_', ' '), limit=_int_arg('limit'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": status.upper(), "total": total, "count": len(engines), "engines": engines})
+
+@app.route('/fleet/range')
+def fleet_range():
+    """
+    Engines with min_rul <= RUL <= max_rul (either bound optional), lowest RUL first.
+    """
+    try:
+        total, engines = fleet_index.range(_float_arg('min_rul'), _float_arg('max_rul'), limit=_int_arg('limit'))
+    except ValueError:
+        return jsonify({"error": "min_rul/max_rul must be numbers and limit an integer"}), 400
+    return jsonify({"total": total, "count": len(engines), "engines": engines})
+
+@app.route('/fleet/stats')
+def fleet_stats():
+    return jsonify(fleet_index.stats())
+
+@app.route('/ready')
+def ready():
+    """
+    Readiness probe: 200 once this worker has loaded the model and served a
+    warm-up prediction, 503 (with the error) until then.
+    """
+    is_ready = warm_up()
+    return jsonify({**readiness, "pid": os.getpid()}), 200 if is_ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """
+    Prometheus text: stage/request latency histograms plus the registry,
+    stream, scheduler, prediction-cache and fleet-index counters of this worker.
+    """
+    body = render_prometheus(
+        families=[STAGE_LATENCY, REQUEST_LATENCY],
+        stats={
+            "model": predict_pipeline.registry.stats(),
+            "stream": stream_pipeline.stats(),
+            "scheduler": batch_scheduler.stats(),
+            "prediction_cache": prediction_cache.stats(),
+            "fleet": fleet_index.stats(),
+        },
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/stream/stats')
+def stream_stats():
+    return jsonify(stream_pipeline.stats())
+
+@app.route('/scheduler/stats')
+def scheduler_stats():
+    return jsonify(batch_scheduler.stats())
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+@app.route('/model/stats')
+def model_stats():
+    return jsonify(predict_pipeline.registry.stats())
     
 if __name__=="__main__":
     app.run(host="0.0.0.0", debug=True)
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Benchmark: vectorized DataTransformation.add_features vs. the original
+per-sensor groupby/lambda implementation.
+
+Run from the repo root:
+    python -m benchmarks.bench_add_features [--repeat 3] [--scales 1 8]
+
+Scale 1 is the ingested data artifact (FD001 by default, any format the
+ArtifactStore wrote); scale 8 tiles it with fresh unit ids to roughly the
+size of FD001-FD004 combined (~160k rows).
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.artifact_store import ArtifactStore, load_frame
+from src.components.data_transformation import DataTransformation, SENSORS, SLOPE_SENSORS
+
+
+def add_features_reference(df):
+    # The pre-vectorization implementation, kept verbatim as the oracle
+    for sensor in SENSORS:
+        df[f'{sensor}_mean'] = df.groupby('unit_nr')[sensor].transform(
+            lambda x: x.rolling(window=5).mean())
+        df[f'{sensor}_std'] = df.groupby('unit_nr')[sensor].transform(
+            lambda x: x.rolling(window=5).std())
+    for sensor in SLOPE_SENSORS:
+        df[f'{sensor}_slope'] = df.groupby('unit_nr')[sensor].diff(periods=5)
+    df.fillna(0, inplace=True)
+    return df
+
+
+def tile_fleet(df, scale):
+    offset = int(df['unit_nr'].max()) + 1
+    return pd.concat(
+        [df.assign(unit_nr=df['unit_nr'] + k * offset) for k in range(scale)],
+        ignore_index=True,
+    )
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        out = fn(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=None, help="data artifact (default: the store's 'data')")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = load_frame(args.data or ArtifactStore().find("data"), mmap=False)
+    transformer = DataTransformation()
+
+    print(f"{'rows':>9} {'reference_s':>12} {'vectorized_s':>13} {'speedup':>8}  identical")
+    for scale in args.scales:
+        df = tile_fleet(base, scale)
+        ref_time, ref = best_of(add_features_reference, df, args.repeat)
+        vec_time, vec = best_of(transformer.add_features, df, args.repeat)
+
+        identical = list(ref.columns) == list(vec.columns) and all(
+            np.array_equal(ref[c].to_numpy(), vec[c].to_numpy()) for c in ref.columns
+        )
+        print(f"{len(df):>9} {ref_time:>12.4f} {vec_time:>13.4f} {ref_time / vec_time:>7.1f}x  {identical}")
+        if not identical:
+            raise SystemExit("Vectorized features differ from the reference implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: DataTransformation.add_features_many on 1..N workers.
+
+Run from the repo root:
+    python -m benchmarks.bench_parallel_features [--workers 1 2 4 8]
+        [--executors process thread] [--scales 8 32] [--repeat 3]
+
+Times the feature step of initiate_data_transformation (train and test
+frames on one pool). Scale 8 tiles the train and test artifacts with
+fresh unit ids to roughly FD001-FD004 combined (~160k rows); larger scales
+stand in for bigger fleets. Every run is checked against the serial output.
+Speedups are bounded by the CPUs actually available (printed first).
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from src.artifact_store import ArtifactStore, load_frame
+from src.components.data_transformation import DataTransformation, DataTransformationConfig
+from benchmarks.bench_add_features import tile_fleet
+
+
+def make_transformer(workers, executor="process"):
+    config = DataTransformationConfig()
+    config.feature_workers = workers
+    config.feature_executor = executor
+    return DataTransformation(config)
+
+
+def best_of(transformer, frames, repeat):
+    timings = []
+    for _ in range(repeat):
+        copies = [df.copy() for df in frames]
+        start = time.perf_counter()
+        out = transformer.add_features_many(copies)
+        timings.append(time.perf_counter() - start)
+    return min(timings), out
+
+
+def identical(a, b):
+    return a.index.equals(b.index) and list(a.columns) == list(b.columns) and all(
+        a[c].dtype == b[c].dtype and np.array_equal(a[c].to_numpy(), b[c].to_numpy()) for c in a.columns
+    )
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cpus})
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--train", default=None, help="train artifact (default: the store's 'train')")
+    parser.add_argument("--test", default=None, help="test artifact (default: the store's 'test')")
+    parser.add_argument("--scales", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--executors", nargs="+", choices=["process", "thread"], default=["process", "thread"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    store = ArtifactStore()
+    train = load_frame(args.train or store.find("train"), mmap=False)
+    test = load_frame(args.test or store.find("test"), mmap=False)
+    print(f"CPUs available: {cpus}")
+    print(f"{'rows':>9} {'executor':>8} {'workers':>7} {'seconds':>9} {'speedup':>8}  identical")
+    for scale in args.scales:
+        frames = [tile_fleet(train, scale), tile_fleet(test, scale)]
+        rows = sum(len(df) for df in frames)
+        serial_time, serial = best_of(make_transformer(1), frames, args.repeat)
+        print(f"{rows:>9} {'serial':>8} {1:>7} {serial_time:>9.4f} {1:>7.2f}x  True")
+
+        for executor in args.executors:
+            for workers in args.workers:
+                if workers <= 1:
+                    continue
+                elapsed, out = best_of(make_transformer(workers, executor), frames, args.repeat)
+                same = all(identical(a, b) for a, b in zip(out, serial))
+                print(f"{rows:>9} {executor:>8} {workers:>7} {elapsed:>9.4f} "
+                      f"{serial_time / elapsed:>7.2f}x  {same}")
+                if not same:
+                    raise SystemExit("Parallel features differ from the serial pass")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Parity check + benchmark: compiled NumPy runtime vs native XGBoost, per batch size.
+
+Run from the repo root (after train_pipeline.py has exported the model):
+    python -m benchmarks.bench_runtimes [--rows 1 4 16 64 256 1000 10000]
+        [--repeat 7] [--tolerance 1e-3]
+
+Loads the served version (CURRENT, else artifacts/) through ModelRegistry
+with runtime="compiled", "native" and "auto", scores the same feature rows
+of the test artifact with each, and exits non-zero if any point prediction
+or quantile bound differs by more than --tolerance. Independent of the
+check inside ModelExporter: it runs against whatever the registry serves.
+Then prints the latency of every runtime per batch size, for point and for
+interval (RUL + bounds) requests; the crossover is what
+ModelRegistryConfig.compiled_max_rows should be on this hardware. The
+`two_models_ms` column scores intervals the old native way (point model,
+then quantile model) next to the merged single-pass booster.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from src.artifact_store import ArtifactStore, load_frame
+from src.components.data_transformation import DataTransformation
+from src.pipelines.model_registry import ModelRegistry, ModelRegistryConfig
+
+RUNTIMES = ("compiled", "native", "auto")
+
+
+def load_registries():
+    registries = {runtime: ModelRegistry(ModelRegistryConfig(runtime=runtime)) for runtime in RUNTIMES}
+    versions = {runtime: registry.get_with_version()[2] for runtime, registry in registries.items()}
+    if len(set(versions.values())) != 1:
+        raise SystemExit(f"Runtimes loaded different versions: {versions}")
+    return registries
+
+
+def feature_rows(layout, n_rows, seed):
+    test_df = DataTransformation().add_features(load_frame(ArtifactStore().find("test"), mmap=False))
+    rows = test_df[layout.feature_names].to_numpy(dtype=np.float64)
+    index = np.random.default_rng(seed).choice(len(rows), size=n_rows, replace=len(rows) < n_rows)
+    return rows[index]
+
+
+def score(registry, X):
+    model, preprocessor, _, _ = registry.get_array_path()
+    interval_model = registry.get_interval_path()[0]
+    scaled = preprocessor.transform(X)
+    if interval_model is None:
+        return model.predict(scaled), None
+    return model.predict(scaled), np.column_stack(interval_model.predict_interval(scaled)[1:])
+
+
+def score_point(registry, X):
+    model, preprocessor, _, _ = registry.get_array_path()
+    return model.predict(preprocessor.transform(X))
+
+
+def score_interval(registry, X):
+    interval_model, preprocessor, _, _ = registry.get_interval_path()
+    return interval_model.predict_interval(preprocessor.transform(X))
+
+
+def score_two_models(registry, X):
+    # Native intervals before the merge: point booster, then quantile booster
+    interval_model, preprocessor, _, _ = registry.get_interval_path()
+    scaled = preprocessor.transform(X)
+    return interval_model.model.predict(scaled), interval_model.interval_model.predict(scaled)
+
+
+def check_parity(registries, X, tolerance):
+    """
+    Max |runtime - native| over points and bounds, per runtime and batch size.
+    """
+    failures = []
+    print(f"{'runtime':>9} {'rows':>6} {'point_diff':>11} {'bound_diff':>11}")
+    for n_rows in sorted({1, 16, 17, len(X)}):
+        expected_point, expected_bounds = score(registries["native"], X[:n_rows])
+        for runtime in ("compiled", "auto"):
+            point, bounds = score(registries[runtime], X[:n_rows])
+            point_diff = float(np.max(np.abs(point - expected_point)))
+            bound_diff = 0.0 if bounds is None else float(np.max(np.abs(bounds - expected_bounds)))
+            print(f"{runtime:>9} {n_rows:>6} {point_diff:>11.2e} {bound_diff:>11.2e}")
+            if max(point_diff, bound_diff) > tolerance:
+                failures.append((runtime, n_rows))
+    return failures
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 4, 16, 64, 256, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    registries = load_registries()
+    layout = registries["native"].get_array_path()[2]
+    X = feature_rows(layout, max(args.rows), args.seed)
+
+    failures = check_parity(registries, X, args.tolerance)
+    if failures:
+        raise SystemExit(f"Runtimes differ beyond {args.tolerance}: {failures}")
+
+    requests = [("point", score_point)]
+    if registries["native"].get_interval_path()[0] is not None:
+        requests.append(("interval", score_interval))
+    for request, fn in requests:
+        print(f"\n{'request':>8} {'rows':>6} " + " ".join(f"{runtime + '_ms':>12}" for runtime in RUNTIMES)
+              + (f" {'two_models_ms':>14}" if request == "interval" else ""))
+        for n_rows in args.rows:
+            timings = [best_of(lambda: fn(registries[runtime], X[:n_rows]), args.repeat) for runtime in RUNTIMES]
+            if request == "interval":
+                timings.append(best_of(lambda: score_two_models(registries["native"], X[:n_rows]), args.repeat))
+            print(f"{request:>8} {n_rows:>6} " + " ".join(f"{t:>12.3f}" for t in timings[:3])
+                  + (f" {timings[3]:>14.3f}" if request == "interval" else ""))
+    print(f"\nauto: compiled up to {registries['auto'].registry_config.compiled_max_rows} rows, native above")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Benchmark: latency and throughput of the Flask service for single-engine
+form posts (/predictdata) and batch scoring (/predict/batch).
+
+Run from the repo root:
+    python -m benchmarks.bench_service [--targets testclient gunicorn]
+        [--concurrency 1 4 16] [--requests 400] [--batch-size 100]
+        [--output benchmarks/results/latest.json]
+        [--baseline benchmarks/results/baseline.json] [--save-baseline]
+
+Requests carry sensor rows sampled (seeded) from the test artifact; the
+warm-up and every scenario/concurrency run get their own slice of them.
+The prediction cache is off (PREDICTION_CACHE_SIZE=0) unless
+--prediction-cache is given, so the numbers measure scoring, not cache
+hits; each result records the cache hits/misses of its own run.
+`testclient` drives app.py in-process through Flask's test client;
+`gunicorn` starts `gunicorn app:app` (gunicorn.conf.py) on a local port
+and talks HTTP/1.1 keep-alive to it. Results are written as JSON; with
+--baseline every scenario is diffed against a stored run and the exit code
+is non-zero when p95 latency or throughput regressed beyond --max-regression.
+The gunicorn target waits for /ready (model preloaded and warm-up served,
+see gunicorn.conf.py) before the first request.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.artifact_store import ArtifactStore, load_frame
+from src.components.feature_schema import INPUT_SENSORS
+
+SCENARIOS = ("single", "batch")
+
+
+def load_rows(path, n_rows, seed):
+    df = load_frame(path)[["unit_nr", *INPUT_SENSORS]]
+    sample = df.sample(n=n_rows, replace=len(df) < n_rows, random_state=seed)
+    return sample.to_dict(orient="records")
+
+
+class TestClientTarget:
+    """
+    app.py in this process; one test client per thread.
+    """
+    name = "testclient"
+
+    def __init__(self, args):
+        os.environ.update(service_env(args))
+        from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def post(self, path, form=None, payload=None):
+        response = self._client().post(path, data=form, json=payload)
+        return response.status_code
+
+    def get_json(self, path):
+        return self._client().get(path).get_json()
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """
+    A local `gunicorn app:app` subprocess; one keep-alive connection per thread.
+    """
+    name = "gunicorn"
+
+    def __init__(self, args):
+        self.host, self.port = "127.0.0.1", args.port
+        env = dict(os.environ, WEB_CONCURRENCY=str(args.workers), **service_env(args))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py",
+             "-b", f"{self.host}:{self.port}"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self._local = threading.local()
+        self._wait_until_up(args.startup_timeout)
+
+    def _wait_until_up(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup (is it installed?)")
+            try:
+                status, _ = self._request("GET", "/ready")
+                if status == 200:
+                    return
+                time.sleep(0.2)
+            except (OSError, http.client.HTTPException):
+                self._local.__dict__.pop("conn", None)
+                time.sleep(0.2)
+        self.close()
+        raise RuntimeError(f"gunicorn did not answer within {timeout}s")
+
+    def _request(self, method, path, body=None, headers=None):
+        for attempt in range(2):
+            if not hasattr(self._local, "conn"):
+                self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self._local.conn.request(method, path, body=body, headers=headers or {})
+                response = self._local.conn.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                # Dropped keep-alive connection: reconnect once
+                self._local.conn.close()
+                del self._local.conn
+                if attempt:
+                    raise
+
+    def post(self, path, form=None, payload=None):
+        if form is not None:
+            body, content_type = urlencode(form), "application/x-www-form-urlencoded"
+        else:
+            body, content_type = json.dumps(payload), "application/json"
+        status, _ = self._request("POST", path, body, {"Content-Type": content_type})
+        return status
+
+    def get_json(self, path):
+        _, body = self._request("GET", path)
+        return json.loads(body)
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+TARGETS = {cls.name: cls for cls in (TestClientTarget, GunicornTarget)}
+
+
+def service_env(args):
+    return {} if args.prediction_cache else {"PREDICTION_CACHE_SIZE": "0"}
+
+
+def make_requests(scenario, rows, n_requests, batch_size, offset=0):
+    """
+    (path, form, payload, rows_per_request) for every request of a scenario,
+    reading rows from `offset` on (wrapping around).
+    """
+    requests = []
+    for i in range(n_requests):
+        if scenario == "single":
+            row = rows[(offset + i) % len(rows)]
+            form = {sensor: row[sensor] for sensor in INPUT_SENSORS}
+            requests.append(("/predictdata", form, None, 1))
+        else:
+            start = offset + i * batch_size
+            batch = [rows[(start + j) % len(rows)] for j in range(batch_size)]
+            requests.append(("/predict/batch", None, batch, batch_size))
+    return requests
+
+
+def cache_delta(before, after):
+    """
+    Prediction-cache hits/misses between two /cache/stats snapshots. Under
+    gunicorn each worker has its own cache and the snapshots may come from
+    different workers, so this is only recorded with a single worker.
+    """
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+
+def run_scenario(target, requests, concurrency):
+    def send(request):
+        path, form, payload, _ = request
+        start = time.perf_counter()
+        status = target.post(path, form=form, payload=payload)
+        return time.perf_counter() - start, status
+
+    # app.py prints per form post; keep it out of the results table
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(send, requests))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in outcomes]) * 1000
+    errors = sum(status != 200 for _, status in outcomes)
+    rows = sum(request[3] for request in requests)
+    return {
+        "requests": len(requests),
+        "errors": int(errors),
+        "seconds": elapsed,
+        "throughput_rps": len(requests) / elapsed,
+        "rows_per_second": rows / elapsed,
+        "latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_key(result):
+    return (result["target"], result["scenario"], result["concurrency"])
+
+
+def compare(results, baseline, max_regression):
+    """
+    Prints the change of every scenario against the baseline and returns
+    the scenarios whose p95 or throughput regressed beyond max_regression.
+    """
+    previous = {scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nvs baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('created_at')})")
+    print(f"{'target':>10} {'scenario':>8} {'conc':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8}")
+    for result in results:
+        old = previous.get(scenario_key(result))
+        if old is None:
+            continue
+        change = {q: result["latency_ms"][q] / old["latency_ms"][q] - 1 for q in ("p50", "p95", "p99")}
+        change["rps"] = result["throughput_rps"] / old["throughput_rps"] - 1
+        print(f"{result['target']:>10} {result['scenario']:>8} {result['concurrency']:>5} "
+              + " ".join(f"{change[k]:>+7.1%}" for k in ("p50", "p95", "p99", "rps")))
+        if change["p95"] > max_regression or change["rps"] < -max_regression:
+            regressions.append(scenario_key(result))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=None, help="test artifact (default: the store's 'test')")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=["testclient"])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario and concurrency level")
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per /predict/batch request")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests before each scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prediction-cache", action="store_true",
+                        help="keep the service's prediction cache on (default: off)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results to --baseline")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # Distinct rows for every run: warm-up + each concurrency level, per scenario
+    rows_per_run = {"single": args.requests, "batch": args.requests * args.batch_size}
+    n_rows = sum(rows_per_run[scenario] * (len(args.concurrency) + 1) for scenario in args.scenarios)
+    rows = load_rows(args.data or ArtifactStore().find("test"), max(n_rows, 1), args.seed)
+    results = []
+    print(f"{'target':>10} {'scenario':>8} {'conc':>5} {'rps':>9} {'rows/s':>10} "
+          f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'errors':>6}")
+
+    for target_name in args.targets:
+        target = TARGETS[target_name](args)
+        try:
+            offset = 0
+            for scenario in args.scenarios:
+                # Parallel warm-up: fills connection pools and per-thread state
+                requests = make_requests(scenario, rows, args.warmup, args.batch_size, offset)
+                run_scenario(target, requests, concurrency=max(args.concurrency))
+                offset += rows_per_run[scenario]
+                for concurrency in args.concurrency:
+                    requests = make_requests(scenario, rows, args.requests, args.batch_size, offset)
+                    offset += rows_per_run[scenario]
+                    before = target.get_json("/cache/stats")
+                    result = {"target": target_name, "scenario": scenario, "concurrency": concurrency,
+                              **run_scenario(target, requests, concurrency)}
+                    if target_name == "testclient" or args.workers == 1:
+                        result["prediction_cache"] = cache_delta(before, target.get_json("/cache/stats"))
+                    results.append(result)
+                    latency = result["latency_ms"]
+                    print(f"{target_name:>10} {scenario:>8} {concurrency:>5} {result['throughput_rps']:>9.1f} "
+                          f"{result['rows_per_second']:>10.1f} {latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+                          f"{latency['p99']:>8.2f} {result['errors']:>6}")
+        finally:
+            target.close()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            raise SystemExit(f"Regressed beyond {args.max_regression:.0%}: {regressions}")
+
+
+if __name__ == "__main__":
+    main()
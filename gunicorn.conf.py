@@ -0,0 +1,42 @@
+# Picked up automatically by `gunicorn app:app` (see Procfile).
+# Threaded workers let concurrent /predictdata posts share a micro-batch
+# (src/pipelines/batch_scheduler.py) instead of predicting one row each.
+import os
+import signal
+
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# Import app.py and load the model once in the master; workers fork with it
+# already in (memory-mapped, shared) memory. GUNICORN_PRELOAD=0 turns it off.
+# PRELOAD_NATIVE=1 also loads the native booster for large batches there
+# (default: each worker loads it on its first batch above 16 rows).
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+def on_starting(server):
+    # Master, before its signal handlers and sockets exist. Stream windows and
+    # the fleet index are owned by one state-server process that every worker
+    # talks to, so they see every request whichever worker receives it.
+    # Importing app registers its SharedObjects (the model is not loaded).
+    import app  # noqa: F401
+    from src.pipelines.shared_state import start_state_server
+    start_state_server()
+
+def on_exit(server):
+    # The arbiter's SIGCHLD handler would reap the state server before
+    # multiprocessing can join it (and then wait out its timeouts)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    from src.pipelines.shared_state import stop_state_server
+    stop_state_server()
+
+def when_ready(server):
+    # Master, after the preloaded app was imported and before any fork
+    if preload_app:
+        from app import preload_model
+        preload_model()
+
+def post_worker_init(worker):
+    # Each worker serves its warm-up prediction before taking traffic (/ready)
+    from app import warm_up
+    warm_up()
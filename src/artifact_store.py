@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+import shutil
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+SCHEMA_FILE = "schema.json"
+
+@dataclass
+class ArtifactStoreConfig:
+    root_dir: str = "artifacts"
+    # "npy"     -> one directory per frame, one memory-mappable .npy per column
+    # "parquet" -> one .parquet file (needs pyarrow)
+    # "csv"     -> the old text format
+    artifact_format: str = "npy"
+    # Also write a .csv copy next to the binary artifact (for eyeballing / Excel)
+    export_csv: bool = False
+
+class _NpyFrameWriter:
+    """
+    Columnar writer: every column is streamed into its own .npy file.
+
+    The .npy header is written up front with shape (0,) and patched on close.
+    NumPy pads 1-D headers so the row count can grow without changing the
+    header length, which lets us append chunks without knowing the total size.
+    """
+    suffix = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".partial"
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        self.columns = None
+        self.dtypes = None
+        self.files = []
+        self.n_rows = 0
+
+    def _header(self, dtype, n_rows):
+        return {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (n_rows,),
+        }
+
+    def append(self, df):
+        if self.columns is None:
+            # First chunk defines the schema
+            self.columns = list(df.columns)
+            self.dtypes = [np.dtype(dtype) for dtype in df.dtypes]
+            for i, dtype in enumerate(self.dtypes):
+                f = open(os.path.join(self.tmp_path, f"col_{i:03d}.npy"), "wb")
+                np.lib.format.write_array_header_1_0(f, self._header(dtype, 0))
+                self.files.append(f)
+        elif list(df.columns) != self.columns:
+            raise ValueError(f"Chunk columns {list(df.columns)} do not match {self.columns}")
+
+        for f, column, dtype in zip(self.files, self.columns, self.dtypes):
+            f.write(np.ascontiguousarray(df[column].to_numpy(), dtype=dtype).tobytes())
+        self.n_rows += len(df)
+
+    def close(self):
+        files = []
+        for i, (f, dtype) in enumerate(zip(self.files, self.dtypes or [])):
+            header_end = f.seek(0, os.SEEK_CUR) - self.n_rows * dtype.itemsize
+            f.seek(0)
+            np.lib.format.write_array_header_1_0(f, self._header(dtype, self.n_rows))
+            if f.tell() != header_end:
+                raise ValueError("npy header length changed while patching the row count")
+            f.close()
+            files.append(f"col_{i:03d}.npy")
+
+        schema = {
+            "format": "npy",
+            "n_rows": self.n_rows,
+            "columns": self.columns or [],
+            "dtypes": [dtype.str for dtype in self.dtypes or []],
+            "files": files,
+        }
+        with open(os.path.join(self.tmp_path, SCHEMA_FILE), "w") as f:
+            json.dump(schema, f, indent=2)
+
+        # Swap the finished directory in place of any previous version
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.rename(self.tmp_path, self.path)
+        return self.path
+
+def _import_pyarrow():
+    # Optional dependency (not in requirements.txt): only the parquet format needs it
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet artifacts need pyarrow, an optional dependency (pip install pyarrow)")
+    return pyarrow
+
+class _ParquetFrameWriter:
+    suffix = ".parquet"
+
+    def __init__(self, path):
+        pyarrow = _import_pyarrow()
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.tmp_path = path + ".partial"
+        self.writer = None
+
+    def append(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.tmp_path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            raise ValueError("Cannot write an empty parquet artifact")
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+class _CsvFrameWriter:
+    suffix = ".csv"
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".partial"
+        self.header_written = False
+
+    def append(self, df):
+        df.to_csv(self.tmp_path, index=False, header=not self.header_written,
+                  mode="a" if self.header_written else "w")
+        self.header_written = True
+
+    def close(self):
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+_WRITERS = {
+    "npy": _NpyFrameWriter,
+    "parquet": _ParquetFrameWriter,
+    "csv": _CsvFrameWriter,
+}
+
+class FrameWriter:
+    """
+    Appends DataFrame chunks to one artifact (plus the optional CSV export).
+    close() finalizes every file and returns the primary artifact path.
+    """
+    def __init__(self, writers):
+        self.writers = writers
+
+    def append(self, df):
+        for writer in self.writers:
+            writer.append(df)
+
+    def close(self):
+        paths = [writer.close() for writer in self.writers]
+        return paths[0]
+
+class ArtifactStore:
+    """
+    Pluggable storage for the DataFrames passed between pipeline stages.
+    """
+    def __init__(self, config=None):
+        self.store_config = config or ArtifactStoreConfig()
+        if self.store_config.artifact_format not in _WRITERS:
+            raise ValueError(f"Unknown artifact format '{self.store_config.artifact_format}'")
+        if self.store_config.artifact_format == "parquet":
+            # Fail when the pipeline is configured, not after ingestion has run
+            _import_pyarrow()
+
+    def path_for(self, name, artifact_format=None):
+        writer_cls = _WRITERS[artifact_format or self.store_config.artifact_format]
+        return os.path.join(self.store_config.root_dir, name + writer_cls.suffix)
+
+    def open_writer(self, name):
+        try:
+            os.makedirs(self.store_config.root_dir, exist_ok=True)
+            formats = [self.store_config.artifact_format]
+            if self.store_config.export_csv and "csv" not in formats:
+                formats.append("csv")
+            return FrameWriter([_WRITERS[fmt](self.path_for(name, fmt)) for fmt in formats])
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def find(self, name):
+        """
+        Path of the existing artifact `name` in whichever format it was written
+        (the configured format first), e.g. for scripts reading train/test.
+        """
+        formats = [self.store_config.artifact_format, *(f for f in _WRITERS if f != self.store_config.artifact_format)]
+        for artifact_format in formats:
+            path = self.path_for(name, artifact_format)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No '{name}' artifact in {self.store_config.root_dir}; run data ingestion first")
+
+def _read_schema(path):
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    if os.path.isdir(path) and os.path.exists(schema_path):
+        with open(schema_path) as f:
+            return json.load(f)
+    return None
+
+def _npy_columns(path, schema, mmap_mode):
+    return {
+        name: np.load(os.path.join(path, file_name), mmap_mode=mmap_mode)
+        for name, file_name in zip(schema["columns"], schema["files"])
+    }
+
+def load_frame(path, mmap=True):
+    """
+    Loads a DataFrame artifact written by ArtifactStore, whatever its format.
+    npy columns are memory-mapped and keep their recorded dtypes, so there
+    is nothing to parse.
+    """
+    try:
+        schema = _read_schema(path)
+        if schema is not None:
+            columns = _npy_columns(path, schema, "r" if mmap else None)
+            return pd.DataFrame(columns, columns=schema["columns"])
+
+        if path.endswith(".parquet"):
+            return _import_pyarrow().parquet.read_table(path).to_pandas()
+
+        return pd.read_csv(path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def iter_frame_chunks(path, chunk_rows=100_000):
+    """
+    Yields an artifact as consecutive DataFrames of at most `chunk_rows` rows,
+    so stages can stream through data that does not fit in memory.
+    """
+    try:
+        schema = _read_schema(path)
+        if schema is not None:
+            columns = _npy_columns(path, schema, "r")
+            for start in range(0, schema["n_rows"], chunk_rows):
+                yield pd.DataFrame(
+                    {name: np.array(values[start:start + chunk_rows]) for name, values in columns.items()},
+                    columns=schema["columns"],
+                )
+
+        elif path.endswith(".parquet"):
+            for batch in _import_pyarrow().parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+
+        else:
+            yield from pd.read_csv(path, chunksize=chunk_rows)
+
+    except Exception as e:
+        raise CustomException(e, sys)
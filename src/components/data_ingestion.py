@@ -1,88 +1,185 @@
 import os
 import sys
+import glob
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.exception import CustomException
 from src.logger import logging
+from src.artifact_store import ArtifactStore, ArtifactStoreConfig, iter_frame_chunks
+
+# Define columns (Same logic as Notebook)
+INDEX_NAMES = ['unit_nr', 'time_cycles']
+SETTING_NAMES = ['setting_1', 'setting_2', 'setting_3']
+SENSOR_NAMES = ['s_{}'.format(i) for i in range(1, 22)]
+RAW_COLUMNS = INDEX_NAMES + SETTING_NAMES + SENSOR_NAMES
 
 # 1. Configuration: Where to save the output files
 @dataclass
 class DataIngestionConfig:
-    train_data_path: str = os.path.join('artifacts', "train.csv")
-    test_data_path: str = os.path.join('artifacts', "test.csv")
-    raw_data_path: str = os.path.join('artifacts', "data.csv")
+    # Raw C-MAPSS files or glob patterns, e.g. 'data/raw/train_FD00*.txt'
+    raw_data_files: list = field(
+        default_factory=lambda: [os.path.join('data', 'raw', 'train_FD001.txt')])
+    # unit_nr of the i-th file (sorted) becomes i * unit_namespace + unit_nr,
+    # so engine 1 of FD001 and engine 1 of FD002 stay different engines
+    unit_namespace: int = 10000
+    # Processes used to parse raw files (None = one per file, up to the CPU count)
+    max_workers: int = None
+
+    artifact_dir: str = 'artifacts'
+    train_data_name: str = "train"
+    test_data_name: str = "test"
+    raw_data_name: str = "data"
+    # Binary columnar artifacts by default; "csv" restores the old text files
+    artifact_format: str = "npy"
+    export_csv: bool = False
+    # Rows per chunk when streaming the combined data into train/test
+    chunk_rows: int = 100_000
+
+def read_raw_file(raw_file_path):
+    """
+    Parses one space-separated C-MAPSS text file (train_FD00x / test_FD00x).
+    """
+    return pd.read_csv(raw_file_path, sep=r'\s+', header=None, names=RAW_COLUMNS)
+
+def parse_training_file(raw_file_path, file_index=0, unit_namespace=10000):
+    """
+    Parses one run-to-failure file and adds the RUL target.
+    Module-level so it can run in a worker process.
+    """
+    df = read_raw_file(raw_file_path)
+
+    # --- CALCULATE RUL (Target) ---
+    # This is the "Business Logic" we prototyped in the notebook:
+    # RUL = last cycle of the engine - current cycle
+    df['RUL'] = df.groupby('unit_nr')['time_cycles'].transform('max') - df['time_cycles']
+
+    # Namespace engine ids per source file
+    df['unit_nr'] += file_index * unit_namespace
+    return df
 
 class DataIngestion:
-    def __init__(self):
-        self.ingestion_config = DataIngestionConfig()
+    def __init__(self, config=None):
+        self.ingestion_config = config or DataIngestionConfig()
+        self.artifact_store = ArtifactStore(ArtifactStoreConfig(
+            root_dir=self.ingestion_config.artifact_dir,
+            artifact_format=self.ingestion_config.artifact_format,
+            export_csv=self.ingestion_config.export_csv,
+        ))
+
+    def get_raw_files(self):
+        """
+        Expands the configured files/globs into a sorted, de-duplicated list.
+        """
+        raw_files = []
+        for pattern in self.ingestion_config.raw_data_files:
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"No raw data file matches '{pattern}'")
+            raw_files.extend(m for m in matches if m not in raw_files)
+        return raw_files
+
+    def get_output_paths(self):
+        """
+        Every artifact initiate_data_ingestion writes, by name.
+        """
+        config = self.ingestion_config
+        formats = [config.artifact_format]
+        if config.export_csv and config.artifact_format != "csv":
+            formats.append("csv")
+        return {
+            f"{name}.{fmt}": self.artifact_store.path_for(name, fmt)
+            for name in (config.raw_data_name, config.train_data_name, config.test_data_name)
+            for fmt in formats
+        }
+
+    def _parse_files(self, raw_files):
+        """
+        Yields the parsed frame of every file, in file order.
+        At most `max_workers` files are parsed (and held in memory) at a time.
+        """
+        namespace = self.ingestion_config.unit_namespace
+        max_workers = self.ingestion_config.max_workers or min(len(raw_files), os.cpu_count() or 1)
+
+        if max_workers <= 1 or len(raw_files) == 1:
+            for i, path in enumerate(raw_files):
+                yield path, parse_training_file(path, i, namespace)
+            return
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            for i, path in enumerate(raw_files):
+                pending.append((path, executor.submit(parse_training_file, path, i, namespace)))
+                if len(pending) >= max_workers:
+                    path_done, future = pending.popleft()
+                    yield path_done, future.result()
+            while pending:
+                path_done, future = pending.popleft()
+                yield path_done, future.result()
 
     def initiate_data_ingestion(self):
         logging.info("Entered the data ingestion method or component")
         try:
-            # --- STEP A: LOAD RAW DATA ---
-            # We are reading the same RAW text file we used in the notebook
-            # Make sure this path is correct relative to where you run the script!
-            raw_file_path = 'data/raw/train_FD001.txt'
-            logging.info(f"Reading raw data from {raw_file_path}")
-            
-            # Define columns (Same logic as Notebook)
-            index_names = ['unit_nr', 'time_cycles']
-            setting_names = ['setting_1', 'setting_2', 'setting_3']
-            sensor_names = ['s_{}'.format(i) for i in range(1, 22)] 
-            col_names = index_names + setting_names + sensor_names
-            
-            df = pd.read_csv(raw_file_path, sep=r'\s+', header=None, names=col_names)
-            logging.info('Read the dataset as dataframe')
+            # --- STEP A: LOAD RAW DATA (+ STEP B: RUL, per file) ---
+            # Make sure these paths are correct relative to where you run the script!
+            raw_files = self.get_raw_files()
+            logging.info(f"Reading raw data from {raw_files}")
 
-            # --- STEP B: CALCULATE RUL (Target) ---
-            # This is the "Business Logic" we prototyped in the notebook
-            logging.info("Calculating RUL for training data...")
-            max_cycles = df.groupby('unit_nr')['time_cycles'].max().reset_index()
-            max_cycles.columns = ['unit_nr', 'max_cycle']
-            df = df.merge(max_cycles, on='unit_nr', how='left')
-            df['RUL'] = df['max_cycle'] - df['time_cycles']
-            df.drop('max_cycle', axis=1, inplace=True)
-            
-            # --- STEP C: SAVE ARTIFACTS ---
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
-            
-            # Save a copy of the full raw data (with RUL)
-            df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
+            # Stream every parsed file straight into the combined artifact,
+            # remembering only the engine ids for the split below
+            unique_units = []
+            raw_writer = self.artifact_store.open_writer(self.ingestion_config.raw_data_name)
+            for path, df in self._parse_files(raw_files):
+                logging.info(f"Parsed {path}: {len(df)} rows, {df['unit_nr'].nunique()} engines")
+                unique_units.append(df['unit_nr'].unique())
+                # Save a copy of the full raw data (with RUL)
+                raw_writer.append(df)
+                del df
+            raw_data_path = raw_writer.close()
+            logging.info('Read the dataset as dataframe')
 
             logging.info("Train test split initiated (Splitting by Engine ID)")
-            
-            # --- STEP D: TRAIN/TEST SPLIT (By Engine ID) ---
+
+            # --- STEP C: TRAIN/TEST SPLIT (By Engine ID) ---
             # We don't use standard train_test_split because of data leakage
-            unique_units = df['unit_nr'].unique()
+            unique_units = np.concatenate(unique_units)
             np.random.seed(42)
             np.random.shuffle(unique_units)
-            
+
             split_point = int(len(unique_units) * 0.8) # 80% Train
             train_units = unique_units[:split_point]
-            test_units = unique_units[split_point:]
-            
-            train_set = df[df['unit_nr'].isin(train_units)]
-            test_set = df[df['unit_nr'].isin(test_units)]
 
-            # Save the split files
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
+            # --- STEP D: SAVE THE SPLIT FILES (chunk by chunk) ---
+            train_writer = self.artifact_store.open_writer(self.ingestion_config.train_data_name)
+            test_writer = self.artifact_store.open_writer(self.ingestion_config.test_data_name)
+            for chunk in iter_frame_chunks(raw_data_path, self.ingestion_config.chunk_rows):
+                in_train = chunk['unit_nr'].isin(train_units)
+                train_writer.append(chunk[in_train])
+                test_writer.append(chunk[~in_train])
+
+            train_data_path = train_writer.close()
+            test_data_path = test_writer.close()
 
             logging.info("Ingestion of the data is completed")
 
             return (
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                train_data_path,
+                test_data_path
             )
 
         except Exception as e:
             raise CustomException(e, sys)
 
 # --- TEST BLOCK (To run this file independently) ---
+# Optional arguments: raw files or globs, e.g. "data/raw/train_FD00*.txt"
 if __name__=="__main__":
-    obj = DataIngestion()
+    config = DataIngestionConfig()
+    if len(sys.argv) > 1:
+        config.raw_data_files = sys.argv[1:]
+    obj = DataIngestion(config)
     train_data, test_data = obj.initiate_data_ingestion()
-    print(f"Data Ingestion Complete. Train: {train_data}, Test: {test_data}")
\ No newline at end of file
+    print(f"Data Ingestion Complete. Train: {train_data}, Test: {test_data}")
@@ -1,24 +1,124 @@
 import sys
 import os
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np 
 import pandas as pd
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
+from pandas.api.indexers import BaseIndexer
 
 from src.exception import CustomException
 from src.logger import logging
 from src.utils import save_object
+from src.artifact_store import load_frame, iter_frame_chunks
+from src.components.feature_schema import SENSORS, SLOPE_SENSORS, ROLLING_WINDOW, FEATURE_COLUMNS
+
+class _UnitWindowIndexer(BaseIndexer):
+    """
+    Trailing window of `window_size` rows that never reaches back past the
+    first row of the current engine (`unit_start`, per row, frame sorted by unit).
+    """
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        start = np.maximum(end - self.window_size, self.unit_start).astype(np.int64)
+        return start, end
+
+def engineer_features(df):
+    """
+    The single-threaded body of DataTransformation.add_features (module
+    level so process pools can pickle it).
+
+    Vectorized: every sensor is rolled in one pass over the frame sorted by
+    engine, with windows clipped at each unit's first row. Output columns
+    are bit-identical to the per-sensor groupby/lambda version.
+    """
+    try:
+        # 1. Sort rows by engine (stable, so cycles keep their order)
+        units = df['unit_nr'].to_numpy()
+        order = np.argsort(units, kind='stable')
+        sorted_units = units[order]
+
+        # First row of every engine, repeated for each of its rows
+        is_first = np.r_[True, sorted_units[1:] != sorted_units[:-1]]
+        first_rows = np.flatnonzero(is_first)
+        unit_start = np.repeat(first_rows, np.diff(np.r_[first_rows, len(sorted_units)]))
+
+        # 2. Rolling Mean & Std (Window = 5), all sensors at once
+        sensor_values = df[SENSORS].iloc[order].reset_index(drop=True)
+        rolling = sensor_values.rolling(
+            _UnitWindowIndexer(window_size=ROLLING_WINDOW, unit_start=unit_start),
+            min_periods=ROLLING_WINDOW,
+        )
+        rolling_mean = rolling.mean().to_numpy()
+        rolling_std = rolling.std().to_numpy()
+
+        # 3. Slope (Lag = 5): x[t] - x[t-5] inside the same engine
+        slope_values = df[SLOPE_SENSORS].to_numpy()[order]
+        rows = np.arange(len(sorted_units))
+        slope = np.full(slope_values.shape, np.nan)
+        has_lag = rows - ROLLING_WINDOW >= unit_start
+        slope[has_lag] = slope_values[has_lag] - slope_values[rows[has_lag] - ROLLING_WINDOW]
+
+        # 4. Scatter back to the caller's row order, same column order as before
+        features = {}
+        mean_std = np.empty((len(order), 2 * len(SENSORS)))
+        mean_std[order, 0::2] = rolling_mean
+        mean_std[order, 1::2] = rolling_std
+        for i, sensor in enumerate(SENSORS):
+            features[f'{sensor}_mean'] = mean_std[:, 2 * i]
+            features[f'{sensor}_std'] = mean_std[:, 2 * i + 1]
+
+        slope_unsorted = np.empty_like(slope)
+        slope_unsorted[order] = slope
+        for i, sensor in enumerate(SLOPE_SENSORS):
+            features[f'{sensor}_slope'] = slope_unsorted[:, i]
+
+        df = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
+
+        # 5. Fill NaNs created by rolling/diff with 0
+        df.fillna(0, inplace=True)
+        
+        return df
+    
+    except Exception as e:
+        raise CustomException(e, sys)
 
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join('artifacts', "preprocessor.pkl")
+    # unit_nr of every train row, for grouped cross-validation in ModelTrainer
+    train_groups_file_path = os.path.join('artifacts', "train_groups.npy")
+    # Scaled [X, y] matrices handed to ModelTrainer (cached between runs)
+    train_arr_file_path = os.path.join('artifacts', "train_arr.npy")
+    test_arr_file_path = os.path.join('artifacts', "test_arr.npy")
+
+    # --- OUT-OF-CORE PATH (initiate_chunked_transformation) ---
+    # Scaled float32 features and targets as .npy memmaps, fed to XGBoost in blocks
+    train_features_file_path = os.path.join('artifacts', "train_features.npy")
+    train_target_file_path = os.path.join('artifacts', "train_target.npy")
+    test_features_file_path = os.path.join('artifacts', "test_features.npy")
+    test_target_file_path = os.path.join('artifacts', "test_target.npy")
+    # Rows read per chunk (always extended to whole engines)
+    chunk_rows = 100_000
+    # Uniform row sample the median imputer is fitted on
+    imputer_sample_rows = 100_000
+
+    # --- PARALLEL FEATURES (add_features_many) ---
+    # Workers computing features per engine shard (None = one per CPU, 1 = serial)
+    feature_workers = None
+    # "thread": no copies, the NumPy/pandas kernels release the GIL for part
+    # of the work; "process": no GIL at all, but every shard and its result
+    # is pickled across (see benchmarks/bench_parallel_features.py)
+    feature_executor = "thread"
+    # Frames are only split into shards of at least this many rows
+    min_shard_rows = 20_000
 
 class DataTransformation:
-    def __init__(self):
-        self.data_transformation_config = DataTransformationConfig()
+    def __init__(self, config=None):
+        self.data_transformation_config = config or DataTransformationConfig()
 
     def get_data_transformer_object(self):
         """
@@ -41,46 +141,91 @@ class DataTransformation:
     def add_features(self, df):
         """
         Re-creating the Rolling Means and Slopes from the Notebook.
+        Large frames run in parallel, see add_features_many().
+        """
+        return self.add_features_many([df])[0]
+
+    def _shard_rows(self, df, n_workers):
+        """
+        Row positions of each shard of `df`: whole engines, about equal row
+        counts, in unit_nr order. None when the frame is not worth splitting.
+        """
+        n_shards = min(n_workers, len(df) // self.data_transformation_config.min_shard_rows)
+        if n_shards <= 1:
+            return None
+        units = df['unit_nr'].to_numpy()
+        order = np.argsort(units, kind='stable')
+        sorted_units = units[order]
+        # Cut at the first engine boundary at or after every 1/n_shards of the rows
+        boundaries = np.r_[np.flatnonzero(np.r_[True, sorted_units[1:] != sorted_units[:-1]]), len(units)]
+        targets = np.arange(1, n_shards) * len(units) / n_shards
+        edges = np.unique(np.r_[0, boundaries[np.searchsorted(boundaries, targets)], len(units)])
+        return [order[start:stop] for start, stop in zip(edges[:-1], edges[1:])]
+
+    def add_features_many(self, frames):
+        """
+        add_features for several frames (train and test) on one worker pool.
+
+        Rolling windows and slopes never cross engines, so every frame is
+        split into shards of whole engines (`_shard_rows`), all shards of all
+        frames run concurrently on `feature_workers` processes or threads,
+        and each frame is put back together in its original row order. The
+        output is bit-identical to the single-threaded pass.
         """
         try:
             logging.info("Engineering features (Rolling Means & Slopes)...")
-            
-            # 1. Define the useful sensors (The "Trenders")
-            sensors = ['s_2', 's_3', 's_4', 's_7', 's_8', 's_9', 's_11', 
-                       's_12', 's_13', 's_14', 's_15', 's_17', 's_20', 's_21']
-            
-            # 2. Rolling Mean & Std (Window = 5)
-            for sensor in sensors:
-                df[f'{sensor}_mean'] = df.groupby('unit_nr')[sensor].transform(
-                    lambda x: x.rolling(window=5).mean())
-                df[f'{sensor}_std'] = df.groupby('unit_nr')[sensor].transform(
-                    lambda x: x.rolling(window=5).std())
-
-            # 3. Slope (Lag = 5)
-            # Sensors that showed strong trends
-            sensors_slope = ['s_2', 's_3', 's_4', 's_7', 's_11', 's_12', 's_15', 's_17', 's_20', 's_21']
-            for sensor in sensors_slope:
-                df[f'{sensor}_slope'] = df.groupby('unit_nr')[sensor].diff(periods=5)
-            
-            # 4. Fill NaNs created by rolling/diff with 0
-            df.fillna(0, inplace=True)
-            
-            return df
-        
+            config = self.data_transformation_config
+            if config.feature_executor not in ("process", "thread"):
+                raise ValueError(f"feature_executor must be 'process' or 'thread', got {config.feature_executor!r}")
+            n_workers = config.feature_workers or os.cpu_count() or 1
+
+            # --- STEP 1: SHARD EVERY FRAME BY ENGINE ---
+            plans = [self._shard_rows(df, n_workers) for df in frames]
+            shards = []
+            for df, plan in zip(frames, plans):
+                shards.extend([df] if plan is None else [df.iloc[rows] for rows in plan])
+
+            # --- STEP 2: FEATURES PER SHARD ---
+            if n_workers <= 1 or len(shards) <= 1:
+                results = [engineer_features(shard) for shard in shards]
+            else:
+                executor_cls = ProcessPoolExecutor if config.feature_executor == "process" else ThreadPoolExecutor
+                logging.info(f"Computing features of {len(shards)} shards on {min(n_workers, len(shards))} "
+                             f"{config.feature_executor} workers")
+                with executor_cls(max_workers=min(n_workers, len(shards))) as executor:
+                    # map() yields in submission order whatever finishes first
+                    results = list(executor.map(engineer_features, shards))
+
+            # --- STEP 3: REASSEMBLE IN THE CALLER'S ROW ORDER ---
+            outputs, position = [], 0
+            for plan in plans:
+                if plan is None:
+                    outputs.append(results[position])
+                    position += 1
+                    continue
+                parts = results[position:position + len(plan)]
+                position += len(plan)
+                rows = np.concatenate(plan)
+                inverse = np.empty_like(rows)
+                inverse[rows] = np.arange(len(rows))
+                outputs.append(pd.concat(parts).iloc[inverse])
+            return outputs
+
         except Exception as e:
             raise CustomException(e, sys)
 
     def initiate_data_transformation(self, train_path, test_path):
         try:
+            # npy/parquet artifacts load with their stored dtypes (CSV still works)
+            train_df = load_frame(train_path)
+            test_df = load_frame(test_path)
             logging.info("Read train and test data completed")
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
 
             logging.info("Obtaining preprocessing object")
 
             # --- STEP 1: FEATURE ENGINEERING ---
-            train_df = self.add_features(train_df)
-            test_df = self.add_features(test_df)
+            # Train and test shards share one worker pool
+            train_df, test_df = self.add_features_many([train_df, test_df])
             
             # --- STEP 2: DEFINE INPUTS (X) AND TARGET (Y) ---
             target_column_name = "RUL"
@@ -112,6 +257,12 @@ class DataTransformation:
             )
             logging.info(f"Saved preprocessing object.")
 
+            # Engine id per train row, so CV folds never split an engine
+            np.save(self.data_transformation_config.train_groups_file_path,
+                    train_df["unit_nr"].to_numpy())
+            np.save(self.data_transformation_config.train_arr_file_path, train_arr)
+            np.save(self.data_transformation_config.test_arr_file_path, test_arr)
+
             return (
                 train_arr,
                 test_arr,
@@ -119,4 +270,128 @@ class DataTransformation:
             )
             
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    # --- OUT-OF-CORE (fleet-scale) PATH ---
+
+    def iter_engine_chunks(self, data_path):
+        """
+        Yields the artifact as frames of whole engines (about `chunk_rows`
+        rows each), so rolling windows never straddle two chunks. Rows of an
+        engine must be contiguous, which is how DataIngestion writes them.
+        """
+        carry = None
+        finished_units = set()
+        for chunk in iter_frame_chunks(data_path, self.data_transformation_config.chunk_rows):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+
+            units = chunk['unit_nr'].to_numpy()
+            run_starts = np.r_[0, np.flatnonzero(units[1:] != units[:-1]) + 1]
+            run_units = units[run_starts]
+            if len(set(run_units.tolist())) != len(run_units) or finished_units.intersection(run_units.tolist()):
+                raise ValueError(f"Rows of an engine are not contiguous in {data_path}")
+
+            # The last engine may continue in the next chunk
+            last_start = run_starts[-1]
+            if last_start > 0:
+                finished_units.update(run_units[:-1].tolist())
+                yield chunk.iloc[:last_start].reset_index(drop=True)
+            carry = chunk.iloc[last_start:].reset_index(drop=True)
+
+        if carry is not None and len(carry):
+            yield carry
+
+    def _iter_feature_blocks(self, data_path):
+        # (features, target, unit_nr) per engine chunk, features in FEATURE_COLUMNS order
+        for chunk in self.iter_engine_chunks(data_path):
+            chunk = self.add_features(chunk)
+            yield pd.DataFrame(chunk[FEATURE_COLUMNS]), chunk["RUL"].to_numpy(), chunk["unit_nr"].to_numpy()
+
+    def _write_feature_matrix(self, data_path, n_rows, preprocessing_obj,
+                              features_path, target_path, groups_path=None):
+        """
+        Streams feature chunks through the fitted preprocessor into float32
+        .npy memmaps. Only one chunk is ever held in memory.
+        """
+        X_out = np.lib.format.open_memmap(features_path, mode="w+", dtype=np.float32,
+                                          shape=(n_rows, len(FEATURE_COLUMNS)))
+        y_out = np.lib.format.open_memmap(target_path, mode="w+", dtype=np.float32, shape=(n_rows,))
+        groups_out = None
+        if groups_path is not None:
+            groups_out = np.lib.format.open_memmap(groups_path, mode="w+", dtype=np.int64, shape=(n_rows,))
+
+        row = 0
+        for features, target, units in self._iter_feature_blocks(data_path):
+            end = row + len(target)
+            X_out[row:end] = preprocessing_obj.transform(features)
+            y_out[row:end] = target
+            if groups_out is not None:
+                groups_out[row:end] = units
+            row = end
+
+        if row != n_rows:
+            raise ValueError(f"Expected {n_rows} rows in {data_path}, wrote {row}")
+        for array in (X_out, y_out, groups_out):
+            if array is not None:
+                array.flush()
+        del X_out, y_out, groups_out
+
+    def initiate_chunked_transformation(self, train_path, test_path):
+        """
+        Same features and preprocessor as initiate_data_transformation, with
+        memory bounded by `chunk_rows` instead of the dataset size:
+          1. one pass: row count + a uniform sample for the median imputer
+          2. one pass: StandardScaler.partial_fit on imputed chunks
+          3. one pass per split: scaled float32 rows into .npy memmaps
+        Features are recomputed per pass (cheap) rather than kept around.
+        """
+        try:
+            config = self.data_transformation_config
+            preprocessing_obj = self.get_data_transformer_object()
+            imputer = preprocessing_obj.named_steps["imputer"]
+            scaler = preprocessing_obj.named_steps["scaler"]
+
+            # --- PASS 1: COUNT ROWS + SAMPLE FOR THE IMPUTER ---
+            # Bottom-k of random keys = uniform sample without knowing n up front
+            logging.info(f"Chunked transformation of {train_path} (chunks of {config.chunk_rows} rows)")
+            rng = np.random.default_rng(42)
+            sample, sample_keys = None, None
+            n_train = 0
+            for features, target, _ in self._iter_feature_blocks(train_path):
+                n_train += len(target)
+                keys = rng.random(len(features))
+                if sample is not None:
+                    features = pd.concat([sample, features], ignore_index=True)
+                    keys = np.r_[sample_keys, keys]
+                if len(keys) > config.imputer_sample_rows:
+                    keep = np.sort(np.argpartition(keys, config.imputer_sample_rows)[:config.imputer_sample_rows])
+                    features, keys = features.iloc[keep].reset_index(drop=True), keys[keep]
+                sample, sample_keys = features, keys
+            imputer.fit(sample)
+            del sample, sample_keys
+
+            # --- PASS 2: SCALER STATISTICS ---
+            for features, _, _ in self._iter_feature_blocks(train_path):
+                scaler.partial_fit(imputer.transform(features))
+
+            save_object(file_path=config.preprocessor_obj_file_path, obj=preprocessing_obj)
+            logging.info(f"Saved preprocessing object fitted on {n_train} rows")
+
+            # --- PASS 3: WRITE SCALED MATRICES ---
+            self._write_feature_matrix(train_path, n_train, preprocessing_obj,
+                                       config.train_features_file_path, config.train_target_file_path,
+                                       config.train_groups_file_path)
+            n_test = sum(len(chunk) for chunk in iter_frame_chunks(test_path, config.chunk_rows))
+            self._write_feature_matrix(test_path, n_test, preprocessing_obj,
+                                       config.test_features_file_path, config.test_target_file_path)
+            logging.info(f"Wrote {n_train} train and {n_test} test rows as float32 memmaps")
+
+            return (
+                (config.train_features_file_path, config.train_target_file_path),
+                (config.test_features_file_path, config.test_target_file_path),
+                config.preprocessor_obj_file_path,
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
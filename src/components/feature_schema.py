@@ -0,0 +1,94 @@
+"""
+Feature layout shared by training (DataTransformation) and serving
+(PredictPipeline, streaming, compiled runtime). Kept free of sklearn/xgboost
+imports so the web process can use it without loading the training stack.
+"""
+import numpy as np
+
+# Useful sensors (The "Trenders") - get rolling mean & std features
+SENSORS = ['s_2', 's_3', 's_4', 's_7', 's_8', 's_9', 's_11', 
+           's_12', 's_13', 's_14', 's_15', 's_17', 's_20', 's_21']
+
+# Sensors that showed strong trends (get a slope feature)
+SLOPE_SENSORS = ['s_2', 's_3', 's_4', 's_7', 's_11', 's_12', 's_15', 's_17', 's_20', 's_21']
+
+ROLLING_WINDOW = 5
+
+# The 10 sensors the web form (and the batch API) accept
+INPUT_SENSORS = ['s_2', 's_3', 's_4', 's_7', 's_11', 's_12', 's_15', 's_17', 's_20', 's_21']
+
+# Raw columns of one C-MAPSS cycle that the model sees (ids/cycle/RUL are dropped)
+BASE_COLUMNS = ['setting_1', 'setting_2', 'setting_3'] + [f's_{i}' for i in range(1, 22)]
+
+def build_feature_columns():
+    """
+    Model input columns, in the exact order DataTransformation produces them.
+    """
+    # 1. Base Columns
+    ordered_cols = list(BASE_COLUMNS)
+
+    # 2. Rolling Mean & Std
+    for s in SENSORS:
+        ordered_cols.append(f'{s}_mean')
+        ordered_cols.append(f'{s}_std')
+
+    # 3. Slopes
+    for s in SLOPE_SENSORS:
+        ordered_cols.append(f'{s}_slope')
+
+    return ordered_cols
+
+FEATURE_COLUMNS = build_feature_columns()
+
+
+class FeatureLayout:
+    """
+    Precompiled model-input layout: column order, name -> index map and the
+    index arrays the request path writes into. Built once (per loaded model),
+    so a request fills a NumPy row directly instead of going through pandas.
+    """
+    def __init__(self, feature_names, expected=None):
+        self.feature_names = [str(c) for c in feature_names]
+        self.n_features = len(self.feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self.validate(expected)
+
+        # "Steady State" form inputs: raw sensor and its rolling mean get the reading
+        self.input_idx = np.array([self.index[s] for s in INPUT_SENSORS])
+        self.input_mean_idx = np.array([self.index[f'{s}_mean'] for s in INPUT_SENSORS])
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """
+        Layout of a fitted preprocessor (sklearn or compiled: both expose
+        feature_names_in_). Raises ValueError unless it matches the columns
+        DataTransformation produces, in the same order.
+        """
+        return cls(preprocessor.feature_names_in_)
+
+    def validate(self, expected=None):
+        expected = FEATURE_COLUMNS if expected is None else list(expected)
+        if self.feature_names == expected:
+            return
+        missing = [c for c in expected if c not in self.index]
+        extra = [c for c in self.feature_names if c not in set(expected)]
+        if missing or extra:
+            raise ValueError(
+                f"Preprocessor features do not match DataTransformation: missing {missing}, extra {extra}")
+        first = next(i for i, (a, b) in enumerate(zip(self.feature_names, expected)) if a != b)
+        raise ValueError(
+            f"Preprocessor feature order differs from DataTransformation at position "
+            f"{first}: '{self.feature_names[first]}' != '{expected[first]}'")
+
+    def steady_state_rows(self, sensor_values):
+        """
+        (n_rows, len(INPUT_SENSORS)) readings -> (n_rows, n_features) model rows,
+        zeros everywhere except the raw sensors and their rolling means.
+        """
+        sensor_values = np.asarray(sensor_values, dtype=np.float64).reshape(-1, len(INPUT_SENSORS))
+        rows = np.zeros((sensor_values.shape[0], self.n_features))
+        rows[:, self.input_idx] = sensor_values
+        rows[:, self.input_mean_idx] = sensor_values
+        return rows
+
+FEATURE_LAYOUT = FeatureLayout(FEATURE_COLUMNS)
@@ -0,0 +1,327 @@
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+from datetime import datetime
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBRegressor
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object
+from src.artifact_store import ArtifactStore, ArtifactStoreConfig, load_frame
+from src.components.data_ingestion import parse_training_file, DataIngestionConfig
+from src.components.data_transformation import DataTransformation
+from src.components.feature_schema import FEATURE_COLUMNS
+from src.components.model_exporter import ModelExporter, ModelExporterConfig
+from src.components.model_versions import ModelVersionStore
+
+@dataclass
+class IncrementalTrainerConfig:
+    # Boosting rounds added on top of the current model, fitted on the new engines only
+    boost_rounds: int = 20
+    # Served when nothing has been published to the version store yet
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    # Quantile heads (optional): updated the same way as the point model
+    interval_model_file_path: str = os.path.join("artifacts", "interval_model.pkl")
+    # Scratch space for the updated artifacts before they are published
+    work_dir: str = os.path.join("artifacts", "incremental")
+    report_file_path: str = os.path.join("artifacts", "incremental_report.json")
+    # Also retrain from scratch on old train + new engines, for the report
+    compare_full_retrain: bool = True
+    # Publish gate: the update only becomes CURRENT if its test RMSE is at most
+    # this much (in RUL cycles) above the served model's; otherwise it stays
+    # in work_dir and the previous version keeps serving
+    max_test_rmse_increase: float = 0.25
+    # Processed splits written by DataIngestion (old train data / held-out engines)
+    artifact_dir: str = "artifacts"
+    train_data_name: str = "train"
+    test_data_name: str = "test"
+
+def remap_split_thresholds(booster, old_mean, old_scale, new_mean, new_scale, reference=None):
+    """
+    Rewrites every split threshold of a booster trained on features scaled
+    with (old_mean, old_scale) so it routes rows scaled with (new_mean,
+    new_scale) the same way: t_new = (t_old * old_scale + old_mean - new_mean) / new_scale.
+    Leaves are untouched. Returns a new Booster.
+
+    XGBoost compares in float32 and hist cuts are themselves readings, so
+    rows sitting exactly on a cut can round to the other side of t_new.
+    `reference` (raw, imputed rows) fixes that: both transforms are monotone,
+    so for each split t_new is clamped until exactly as many reference rows
+    fall below it as fell below t_old.
+    """
+    model = json.loads(booster.save_raw("json"))
+    trees = model["learner"]["gradient_booster"]["model"]["trees"]
+
+    # Every split node of every tree, flattened
+    feature, t_old, owners = [], [], []
+    for i, tree in enumerate(trees):
+        split_nodes = np.flatnonzero(np.asarray(tree["left_children"]) != -1)
+        feature.append(np.asarray(tree["split_indices"])[split_nodes])
+        t_old.append(np.asarray(tree["split_conditions"], dtype=np.float32)[split_nodes])
+        owners.append((i, split_nodes))
+    feature, t_old = np.concatenate(feature), np.concatenate(t_old)
+
+    raw = t_old.astype(np.float64) * old_scale[feature] + old_mean[feature]
+    t_new = ((raw - new_mean[feature]) / new_scale[feature]).astype(np.float32)
+
+    if reference is not None:
+        reference = np.asarray(reference, dtype=np.float64)
+        old_sorted = np.sort(((reference - old_mean) / old_scale).astype(np.float32), axis=0)
+        new_sorted = np.sort(((reference - new_mean) / new_scale).astype(np.float32), axis=0)
+        n_rows = len(reference)
+        for f in np.unique(feature):
+            nodes = np.flatnonzero(feature == f)
+            n_left = np.searchsorted(old_sorted[:, f], t_old[nodes], side="left")
+            # t_new must lie in (new_sorted[n_left - 1], new_sorted[n_left]]
+            lower = np.where(n_left > 0, new_sorted[np.maximum(n_left - 1, 0), f], -np.inf).astype(np.float32)
+            upper = np.where(n_left < n_rows, new_sorted[np.minimum(n_left, n_rows - 1), f], np.inf).astype(np.float32)
+            t = t_new[nodes]
+            t = np.where(t <= lower, np.nextafter(lower, np.float32(np.inf)), t)
+            t = np.where(t > upper, upper, t)
+            t_new[nodes] = t
+
+    # Write the thresholds back, tree by tree
+    start = 0
+    for i, split_nodes in owners:
+        condition = np.asarray(trees[i]["split_conditions"], dtype=np.float32)
+        condition[split_nodes] = t_new[start:start + len(split_nodes)]
+        trees[i]["split_conditions"] = condition.tolist()
+        start += len(split_nodes)
+
+    remapped = xgb.Booster()
+    remapped.load_model(bytearray(json.dumps(model).encode()))
+    return remapped
+
+class IncrementalTrainer:
+    """
+    Updates the served model with new run-to-failure engines instead of
+    rerunning train_pipeline.py:
+      1. scaler: running mean/variance updated with StandardScaler.partial_fit
+         (the median imputer is kept as is)
+      2. trees: split thresholds remapped into the updated scaled space, so
+         the existing trees keep routing the new rows as before (float32
+         rounding of the remapped thresholds still moves some predictions,
+         reported as threshold_remap_max_diff)
+      3. boosting continues for `boost_rounds` trees on the new engines only
+    Quantile heads (interval_model.pkl), when present, get steps 2-3 too.
+    The result is exported and scored on the held-out test engines; it is
+    published as a new version (atomic pointer swap picked up by the model
+    registry) only if its test RMSE is within `max_test_rmse_increase` of
+    the served model's. Timed against a full retrain.
+    """
+    def __init__(self, config=None, version_store=None):
+        self.trainer_config = config or IncrementalTrainerConfig()
+        self.version_store = version_store or ModelVersionStore()
+        self.artifact_store = ArtifactStore(ArtifactStoreConfig(root_dir=self.trainer_config.artifact_dir))
+        self.transformation = DataTransformation()
+        self.timings = {}
+
+    def _run_stage(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.timings[name] = time.perf_counter() - start
+        logging.info(f"Incremental stage '{name}' took {self.timings[name]:.4f}s")
+        return result
+
+    def _current_artifacts(self):
+        version = self.version_store.current()
+        if version is not None:
+            return version, self.version_store.version_paths(version)
+        config = self.trainer_config
+        return None, {
+            "model_file_path": config.model_file_path,
+            "preprocessor_file_path": config.preprocessor_file_path,
+            "interval_model_file_path": config.interval_model_file_path,
+        }
+
+    def _max_unit_nr(self):
+        # Highest engine id already used: the ingested splits, plus engines
+        # folded in by earlier incremental updates (recorded per version)
+        config = self.trainer_config
+        unit_ids = [int(load_frame(self.artifact_store.find(name))["unit_nr"].max())
+                    for name in (config.train_data_name, config.test_data_name)]
+        unit_ids += [v["max_unit_nr"] for v in self.version_store.list_versions() if "max_unit_nr" in v]
+        return max(unit_ids)
+
+    def _load_new_engines(self, new_data_files):
+        # Each file gets the next free unit_namespace slot after the highest
+        # stored engine id, so new engines never collide with known ones
+        namespace = DataIngestionConfig.unit_namespace
+        first_index = self._max_unit_nr() // namespace + 1
+        frames = [parse_training_file(path, first_index + i, namespace) for i, path in enumerate(new_data_files)]
+        return self.transformation.add_features(pd.concat(frames, ignore_index=True))
+
+    def _rmse(self, model, preprocessor, df):
+        predicted = model.predict(preprocessor.transform(df[FEATURE_COLUMNS]))
+        return float(np.sqrt(np.mean((df["RUL"].to_numpy() - predicted) ** 2)))
+
+    def _full_retrain(self, model, new_df):
+        # What train_pipeline.py would do with the new engines appended
+        train_df = self.transformation.add_features(load_frame(self.artifact_store.find(self.trainer_config.train_data_name)))
+        full_df = pd.concat([train_df, new_df], ignore_index=True)
+        preprocessor = self.transformation.get_data_transformer_object()
+        X = preprocessor.fit_transform(full_df[FEATURE_COLUMNS])
+        full_model = XGBRegressor(**model.get_params())
+        full_model.fit(X, full_df["RUL"].to_numpy())
+        return full_model, preprocessor
+
+    def initiate_incremental_update(self, new_data_files):
+        logging.info(f"Entered the incremental update component with {new_data_files}")
+        config = self.trainer_config
+        try:
+            self.timings = {}
+            total_start = time.perf_counter()
+
+            # --- STEP 1: CURRENT MODEL + NEW ENGINES ---
+            base_version, paths = self._current_artifacts()
+            def load_models():
+                interval_path = paths["interval_model_file_path"]
+                interval_model = load_object(interval_path) if os.path.exists(interval_path) else None
+                return load_object(paths["model_file_path"]), load_object(paths["preprocessor_file_path"]), interval_model
+            model, preprocessor, interval_model = self._run_stage("load_model", load_models)
+            new_df = self._run_stage("ingest_features", self._load_new_engines, new_data_files)
+            X_new = new_df[FEATURE_COLUMNS]
+            y_new = new_df["RUL"].to_numpy()
+
+            # --- STEP 2: RUNNING-MOMENT SCALER UPDATE ---
+            def update_scaler():
+                updated = copy.deepcopy(preprocessor)
+                imputer = updated.named_steps["imputer"]
+                updated.named_steps["scaler"].partial_fit(imputer.transform(X_new))
+                return updated
+            new_preprocessor = self._run_stage("update_scaler", update_scaler)
+            old_scaler = preprocessor.named_steps["scaler"]
+            new_scaler = new_preprocessor.named_steps["scaler"]
+
+            # --- STEP 3: MOVE THE EXISTING TREES INTO THE NEW SCALED SPACE ---
+            models = [model] if interval_model is None else [model, interval_model]
+            reference = new_preprocessor.named_steps["imputer"].transform(X_new)
+            def remap():
+                return [remap_split_thresholds(m.get_booster(), old_scaler.mean_, old_scaler.scale_,
+                                               new_scaler.mean_, new_scaler.scale_, reference)
+                        for m in models]
+            boosters = self._run_stage("remap_trees", remap)
+            X_new_scaled = new_preprocessor.transform(X_new)
+            X_old_scaled = preprocessor.transform(X_new)
+            # Routing check: how far the remapped trees move the old predictions
+            remap_max_diff = max(
+                float(np.max(np.abs(b.inplace_predict(X_new_scaled) - m.predict(X_old_scaled))))
+                for m, b in zip(models, boosters))
+            logging.info(f"Threshold remap max prediction change: {remap_max_diff}")
+
+            # --- STEP 4: CONTINUE BOOSTING ON THE NEW ENGINES ---
+            def boost():
+                updated = []
+                for m, b in zip(models, boosters):
+                    new_m = XGBRegressor(**{**m.get_params(), "n_estimators": config.boost_rounds})
+                    new_m.fit(X_new_scaled, y_new, xgb_model=b)
+                    updated.append(new_m)
+                return updated
+            new_model, *new_interval_model = self._run_stage("boost", boost)
+
+            # --- STEP 5: SAVE AND EXPORT ---
+            exporter_config = ModelExporterConfig()
+            exporter_config.model_file_path = os.path.join(config.work_dir, "model.pkl")
+            exporter_config.preprocessor_file_path = os.path.join(config.work_dir, "preprocessor.pkl")
+            exporter_config.interval_model_file_path = os.path.join(config.work_dir, "interval_model.pkl")
+            exporter_config.compiled_model_dir = os.path.join(config.work_dir, "compiled_model")
+            def export():
+                os.makedirs(config.work_dir, exist_ok=True)
+                save_object(exporter_config.model_file_path, new_model)
+                save_object(exporter_config.preprocessor_file_path, new_preprocessor)
+                if new_interval_model:
+                    save_object(exporter_config.interval_model_file_path, new_interval_model[0])
+                elif os.path.exists(exporter_config.interval_model_file_path):
+                    os.remove(exporter_config.interval_model_file_path)
+                ModelExporter(exporter_config).initiate_model_export()
+            self._run_stage("export", export)
+
+            # --- STEP 6: EVALUATE, THEN PUBLISH ONLY IF TEST RMSE HOLDS ---
+            test_df = self.transformation.add_features(load_frame(self.artifact_store.find(config.test_data_name)))
+            rmse = self._run_stage("evaluate", lambda: {
+                "previous": {"test": self._rmse(model, preprocessor, test_df),
+                             "new_engines": self._rmse(model, preprocessor, new_df)},
+                "incremental": {"test": self._rmse(new_model, new_preprocessor, test_df),
+                                "new_engines": self._rmse(new_model, new_preprocessor, new_df)},
+            })
+            test_rmse_change = rmse["incremental"]["test"] - rmse["previous"]["test"]
+            published = test_rmse_change <= config.max_test_rmse_increase
+            if published:
+                new_version = self._run_stage("publish", lambda: self.version_store.publish(
+                    exporter_config.model_file_path, exporter_config.preprocessor_file_path,
+                    exporter_config.compiled_model_dir,
+                    metadata={"source": "incremental", "new_data_files": list(new_data_files),
+                              "boost_rounds": config.boost_rounds,
+                              "max_unit_nr": int(new_df["unit_nr"].max())},
+                    interval_model_file_path=exporter_config.interval_model_file_path))
+            else:
+                new_version = None
+                logging.info(f"Incremental update not published: test RMSE changed by {test_rmse_change:+.4f} "
+                             f"(allowed +{config.max_test_rmse_increase}); {base_version or 'artifacts/'} "
+                             f"keeps serving, the update stays in {config.work_dir}")
+            incremental_seconds = time.perf_counter() - total_start
+
+            # --- STEP 7: COMPARISON REPORT ---
+            report = {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "base_version": base_version,
+                "new_version": new_version,
+                "published": published,
+                "test_rmse_change": test_rmse_change,
+                "max_test_rmse_increase": config.max_test_rmse_increase,
+                "new_data_files": list(new_data_files),
+                "new_engines": int(new_df["unit_nr"].nunique()),
+                "new_rows": int(len(new_df)),
+                "trees": {"before": int(model.get_booster().num_boosted_rounds()),
+                          "after": int(new_model.get_booster().num_boosted_rounds())},
+                "threshold_remap_max_diff": remap_max_diff,
+                "incremental_seconds": incremental_seconds,
+                "stage_seconds": dict(self.timings),
+                "rmse": rmse,
+            }
+            if config.compare_full_retrain:
+                start = time.perf_counter()
+                full_model, full_preprocessor = self._full_retrain(model, new_df)
+                report["full_retrain_seconds"] = time.perf_counter() - start
+                report["speedup"] = report["full_retrain_seconds"] / incremental_seconds
+                report["rmse"]["full_retrain"] = {
+                    "test": self._rmse(full_model, full_preprocessor, test_df),
+                    "new_engines": self._rmse(full_model, full_preprocessor, new_df),
+                }
+
+            os.makedirs(os.path.dirname(config.report_file_path), exist_ok=True)
+            with open(config.report_file_path, "w") as f:
+                json.dump(report, f, indent=2)
+            logging.info(f"Incremental update report written to {config.report_file_path}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+# --- TEST BLOCK (To run this file independently) ---
+# python -m src.components.incremental_trainer data/raw/new_engines.txt [--rounds 20] [--no-compare] [--max-rmse-increase 0.25]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the served model with new run-to-failure engines")
+    parser.add_argument("files", nargs="+", help="new C-MAPSS training files")
+    parser.add_argument("--rounds", type=int, default=IncrementalTrainerConfig.boost_rounds)
+    parser.add_argument("--no-compare", action="store_true", help="skip the full-retrain comparison")
+    parser.add_argument("--max-rmse-increase", type=float, default=IncrementalTrainerConfig.max_test_rmse_increase,
+                        help="publish only if test RMSE rises by at most this much")
+    args = parser.parse_args()
+
+    config = IncrementalTrainerConfig(boost_rounds=args.rounds, compare_full_retrain=not args.no_compare,
+                                      max_test_rmse_increase=args.max_rmse_increase)
+    report = IncrementalTrainer(config).initiate_incremental_update(args.files)
+    print(json.dumps({k: report[k] for k in ("new_version", "published", "test_rmse_change",
+                                             "incremental_seconds", "rmse")}, indent=2))
+    if "full_retrain_seconds" in report:
+        print(f"Full retrain: {report['full_retrain_seconds']:.2f}s ({report['speedup']:.1f}x slower)")
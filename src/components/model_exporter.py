@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import shutil
+from datetime import datetime
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, get_model_version
+from src.pipelines.compiled_model import CompiledModel, CompiledPreprocessor, META_FILE
+
+# Objectives whose prediction is the raw margin (no link function)
+IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror", "reg:quantileerror"}
+
+@dataclass
+class ModelExporterConfig:
+    model_file_path = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path = os.path.join("artifacts", "preprocessor.pkl")
+    # Optional multi-quantile model (ModelTrainer.initiate_interval_trainer)
+    interval_model_file_path = os.path.join("artifacts", "interval_model.pkl")
+    compiled_model_dir = os.path.join("artifacts", "compiled_model")
+    # Export fails if the NumPy runtime drifts further than this from model.predict
+    parity_tolerance = 1e-3
+    parity_sample_rows = 2000
+
+def _parse_base_score(value):
+    # XGBoost >= 3 stores "[1.0665912E2]" (one entry per target), older "1.06E2"
+    return [float(v) for v in value.strip("[]").split(",")]
+
+def _tree_depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):
+        # Children always have higher ids than their parent in XGBoost trees
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+def merge_forests(point_arrays, point_meta, interval_arrays, interval_meta, quantiles):
+    """
+    Appends the quantile model's trees to the point model's node arrays:
+    output 0 stays the point RUL, outputs 1.. are the quantile heads. One
+    traversal of the merged forest scores every head.
+    """
+    offset = len(point_arrays["feature"])
+    n_point_outputs = len(point_meta["base_score"])
+    arrays = {}
+    for name in ("feature", "threshold", "default_left", "value"):
+        arrays[name] = np.concatenate([point_arrays[name], interval_arrays[name]])
+    for name in ("left", "right", "roots"):
+        arrays[name] = np.concatenate([point_arrays[name], interval_arrays[name] + offset]).astype(np.int32)
+    arrays["tree_group"] = np.concatenate(
+        [point_arrays["tree_group"], interval_arrays["tree_group"] + n_point_outputs]).astype(np.int32)
+
+    meta = {
+        **point_meta,
+        "base_score": point_meta["base_score"] + interval_meta["base_score"],
+        "n_trees": point_meta["n_trees"] + interval_meta["n_trees"],
+        "max_depth": max(point_meta["max_depth"], interval_meta["max_depth"]),
+        "quantiles": quantiles,
+    }
+    return arrays, meta
+
+def merge_boosters(model, interval_model):
+    """
+    Native counterpart of merge_forests: one multi-output XGBoost Booster
+    holding the point model's trees (output 0) and the quantile model's
+    (outputs 1..), so a single inplace_predict scores the RUL and its
+    bounds. Both objectives must be identity links.
+    """
+    import xgboost as xgb
+
+    point = json.loads(model.get_booster().save_raw("json"))
+    merged = json.loads(interval_model.get_booster().save_raw("json"))
+    point_learner, learner = point["learner"], merged["learner"]
+    for objective in (point_learner["objective"]["name"], learner["objective"]["name"]):
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective {objective} needs a link function; cannot merge")
+
+    point_trees = point_learner["gradient_booster"]["model"]
+    trees = learner["gradient_booster"]["model"]
+    n_point_outputs = int(point_learner["learner_model_param"]["num_target"])
+    base_score = (_parse_base_score(point_learner["learner_model_param"]["base_score"])
+                  + _parse_base_score(learner["learner_model_param"]["base_score"]))
+    alphas = _parse_base_score(learner["objective"]["quantile_loss_param"]["quantile_alpha"])
+
+    # Point trees first (their rounds, then the quantile model's), re-numbered
+    trees["trees"] = point_trees["trees"] + trees["trees"]
+    for tree_id, tree in enumerate(trees["trees"]):
+        tree["id"] = tree_id
+    trees["tree_info"] = point_trees["tree_info"] + [group + n_point_outputs for group in trees["tree_info"]]
+    indptr = point_trees["iteration_indptr"]
+    trees["iteration_indptr"] = indptr + [indptr[-1] + end for end in trees["iteration_indptr"][1:]]
+    trees["gbtree_model_param"]["num_trees"] = str(len(trees["trees"]))
+    learner["learner_model_param"]["num_target"] = str(len(base_score))
+    learner["learner_model_param"]["base_score"] = "[" + ",".join(repr(b) for b in base_score) + "]"
+    # Only read for training; the point outputs get a placeholder alpha
+    learner["objective"]["quantile_loss_param"]["quantile_alpha"] = (
+        "[" + ",".join(repr(a) for a in [0.5] * n_point_outputs + alphas) + "]")
+
+    booster = xgb.Booster()
+    booster.load_model(bytearray(json.dumps(merged).encode()))
+    return booster
+
+class ModelExporter:
+    """
+    Fuses the fitted preprocessor and the XGBoost booster into flat NumPy
+    arrays that src/pipelines/compiled_model.py can serve without sklearn,
+    xgboost or pickle.
+    """
+    def __init__(self, config=None):
+        self.model_exporter_config = config or ModelExporterConfig()
+
+    def export_preprocessor(self, preprocessor):
+        compiled = CompiledPreprocessor.from_pipeline(preprocessor)
+        arrays = {
+            "impute_values": compiled.impute_values,
+            "mean": compiled.mean,
+            "scale": compiled.scale,
+        }
+        return arrays, list(compiled.feature_names_in_)
+
+    def export_booster(self, model):
+        learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+        booster = learner["gradient_booster"]
+        objective = learner["objective"]["name"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Only gbtree boosters can be compiled, got {booster['name']}")
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective {objective} needs a link function; not supported")
+
+        trees = booster["model"]["trees"]
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]) or int(tree["tree_param"]["size_leaf_vector"]) > 1:
+                raise ValueError("Categorical splits and vector leaves are not supported")
+
+            tree_left = np.asarray(tree["left_children"], dtype=np.int64)
+            tree_right = np.asarray(tree["right_children"], dtype=np.int64)
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = tree_left == -1
+            node_ids = np.arange(len(tree_left)) + offset
+
+            # Leaves point to themselves; split_conditions holds the leaf value there
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+            threshold.append(np.where(is_leaf, 0, conditions))
+            left.append(np.where(is_leaf, node_ids, tree_left + offset))
+            right.append(np.where(is_leaf, node_ids, tree_right + offset))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            value.append(np.where(is_leaf, conditions, 0))
+            roots.append(offset)
+
+            max_depth = max(max_depth, _tree_depth(tree_left, tree_right))
+            offset += len(tree_left)
+
+        arrays = {
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float32),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "default_left": np.concatenate(default_left),
+            "value": np.concatenate(value).astype(np.float32),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "tree_group": np.asarray(booster["model"]["tree_info"], dtype=np.int32),
+        }
+        meta = {
+            "objective": objective,
+            "base_score": _parse_base_score(learner["learner_model_param"]["base_score"]),
+            "n_trees": len(trees),
+            "max_depth": max_depth,
+        }
+        return arrays, meta
+
+    def check_parity(self, model, preprocessor, compiled, sample_features=None, interval_model=None):
+        """
+        Max |model.predict - compiled.predict| on raw feature rows (and of
+        every quantile head when there is an interval model).
+        Without a sample, rows are drawn around the scaler's mean/std.
+        """
+        config = self.model_exporter_config
+        feature_names = list(preprocessor.feature_names_in_)
+        if sample_features is None:
+            scaler = preprocessor.named_steps["scaler"]
+            rng = np.random.default_rng(42)
+            scaled = rng.standard_normal((config.parity_sample_rows, len(feature_names)))
+            sample_features = scaler.inverse_transform(scaled)
+
+        raw = pd.DataFrame(np.asarray(sample_features)[:config.parity_sample_rows], columns=feature_names)
+        scaled = preprocessor.transform(raw)
+        expected = model.predict(scaled)
+        actual = compiled.predict(raw.to_numpy())
+        max_diff = float(np.max(np.abs(np.asarray(expected, dtype=np.float64) - actual)))
+        if interval_model is not None:
+            expected_heads = np.asarray(interval_model.predict(scaled), dtype=np.float64)
+            actual_heads = compiled.predict_heads(raw.to_numpy())[:, 1:]
+            max_diff = max(max_diff, float(np.max(np.abs(expected_heads - actual_heads))))
+        return max_diff
+
+    def initiate_model_export(self, sample_features=None):
+        """
+        Compiles model.pkl + preprocessor.pkl into `compiled_model_dir` and
+        verifies it against model.predict. `sample_features` are optional raw
+        (unscaled) feature rows for the parity check.
+        """
+        logging.info("Entered the model export component")
+        config = self.model_exporter_config
+        try:
+            model = load_object(file_path=config.model_file_path)
+            preprocessor = load_object(file_path=config.preprocessor_file_path)
+
+            pre_arrays, feature_names = self.export_preprocessor(preprocessor)
+            tree_arrays, meta = self.export_booster(model)
+
+            interval_model = None
+            if os.path.exists(config.interval_model_file_path):
+                interval_model = load_object(file_path=config.interval_model_file_path)
+                quantiles = [float(q) for q in np.atleast_1d(interval_model.get_params()["quantile_alpha"])]
+                tree_arrays, meta = merge_forests(
+                    tree_arrays, meta, *self.export_booster(interval_model), quantiles)
+
+            arrays = {**pre_arrays, **tree_arrays}
+            meta.update({
+                "feature_names": feature_names,
+                "arrays": list(arrays),
+                # The registry only serves this export for exactly these pickles
+                "source_version": get_model_version(
+                    config.model_file_path, config.preprocessor_file_path, config.interval_model_file_path),
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            })
+
+            # --- WRITE TO A TEMP DIR, VERIFY, THEN SWAP IN ---
+            tmp_dir = config.compiled_model_dir + ".partial"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump(meta, f, indent=2)
+
+            max_diff = self.check_parity(model, preprocessor, CompiledModel(tmp_dir), sample_features, interval_model)
+            logging.info(f"Compiled model parity: max abs diff {max_diff}")
+            if max_diff > config.parity_tolerance:
+                raise ValueError(
+                    f"Compiled model differs from model.predict by {max_diff} "
+                    f"(tolerance {config.parity_tolerance})")
+
+            shutil.rmtree(config.compiled_model_dir, ignore_errors=True)
+            os.rename(tmp_dir, config.compiled_model_dir)
+
+            print(f"Compiled model exported ({meta['n_trees']} trees, parity max diff {max_diff:.2e})")
+            logging.info(f"Compiled model written to {config.compiled_model_dir}")
+            return config.compiled_model_dir
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+# --- TEST BLOCK (To run this file independently) ---
+# Exports artifacts/model.pkl and runs the parity check on the test artifact's rows
+if __name__ == "__main__":
+    from src.artifact_store import ArtifactStore, load_frame
+    from src.components.data_transformation import DataTransformation
+
+    test_df = DataTransformation().add_features(load_frame(ArtifactStore().find("test")))
+    feature_names = list(load_object(ModelExporterConfig.preprocessor_file_path).feature_names_in_)
+    ModelExporter().initiate_model_export(test_df[feature_names].to_numpy())
@@ -1,9 +1,17 @@
 import os
 import sys
-from dataclasses import dataclass
+import json
+import shutil
+import hashlib
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 
+import xgboost as xgb
 from xgboost import XGBRegressor
 from sklearn.metrics import r2_score, mean_squared_error
+from sklearn.model_selection import GroupKFold, GroupShuffleSplit
 import numpy as np
 
 from src.exception import CustomException
@@ -13,15 +21,211 @@ from src.utils import save_object
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join("artifacts", "model.pkl")
+    # The best params from our Notebook (overridden by a hyperparameter search)
+    model_params: dict = field(default_factory=lambda: {
+        "n_estimators": 100,
+        "learning_rate": 0.1,
+        "max_depth": 6,
+    })
+
+    # --- PREDICTION INTERVALS (initiate_interval_trainer) ---
+    # One multi-quantile XGBoost model; its heads give the lower/upper RUL bounds
+    interval_model_file_path = os.path.join("artifacts", "interval_model.pkl")
+    interval_quantiles: list = field(default_factory=lambda: [0.1, 0.9])
+
+    # --- HYPERPARAMETER SEARCH ---
+    search_param_grid: dict = field(default_factory=lambda: {
+        "max_depth": [4, 6, 8],
+        "learning_rate": [0.05, 0.1],
+        "min_child_weight": [1, 5],
+        "subsample": [0.8, 1.0],
+    })
+    search_n_splits: int = 5
+    # Upper bound on trees; early stopping picks the real number per fold
+    search_max_rounds: int = 1000
+    search_early_stopping_rounds: int = 30
+    # Share of each training fold's engines held out for early stopping, so
+    # the validation fold that scores the trial never picks its tree count
+    search_early_stopping_fraction: float = 0.2
+    # XGBoost threads per trial; parallel trials = CPUs // cores_per_trial
+    search_cores_per_trial: int = 2
+    search_max_workers: int = None
+    search_cache_dir: str = os.path.join("artifacts", "search_cache")
+    # Fold sets kept on disk (least recently used are deleted beyond this)
+    search_cache_keep: int = 2
+    search_results_file_path: str = os.path.join("artifacts", "search_results.json")
+
+    # --- OUT-OF-CORE TRAINING (initiate_external_memory_training) ---
+    # Rows per block handed to XGBoost; its quantized pages are cached on disk here
+    external_batch_rows: int = 100_000
+    external_cache_dir: str = os.path.join("artifacts", "xgb_cache")
+
+def _run_search_trial(params, fold_dirs, n_jobs, max_rounds, early_stopping_rounds):
+    """
+    Fits one parameter set on every cached fold, early-stopped on the fold's
+    held-out engines (X_stop), and scores it on the validation fold.
+    Module-level so it can run in a worker process; folds are memory-mapped
+    from the cache instead of being pickled to the worker.
+    """
+    scores, best_iterations = [], []
+    for fold_dir in fold_dirs:
+        X_train = np.load(os.path.join(fold_dir, "X_train.npy"), mmap_mode="r")
+        y_train = np.load(os.path.join(fold_dir, "y_train.npy"), mmap_mode="r")
+        X_stop = np.load(os.path.join(fold_dir, "X_stop.npy"), mmap_mode="r")
+        y_stop = np.load(os.path.join(fold_dir, "y_stop.npy"), mmap_mode="r")
+        X_val = np.load(os.path.join(fold_dir, "X_val.npy"), mmap_mode="r")
+        y_val = np.load(os.path.join(fold_dir, "y_val.npy"), mmap_mode="r")
+
+        model = XGBRegressor(
+            n_estimators=max_rounds,
+            early_stopping_rounds=early_stopping_rounds,
+            n_jobs=n_jobs,
+            random_state=42,
+            **params
+        )
+        model.fit(X_train, y_train, eval_set=[(X_stop, y_stop)], verbose=False)
+        # predict() stops at best_iteration
+        scores.append(float(np.sqrt(mean_squared_error(y_val, model.predict(X_val)))))
+        best_iterations.append(int(model.best_iteration))
+
+    return {
+        "params": params,
+        "rmse_mean": float(np.mean(scores)),
+        "rmse_std": float(np.std(scores)),
+        "best_iterations": best_iterations,
+    }
+
+class _MemmapBatchIter(xgb.DataIter):
+    """
+    Feeds a memory-mapped (features, target) .npy pair to XGBoost one block
+    of rows at a time, so the full matrix is never loaded.
+    """
+    def __init__(self, features_path, target_path, batch_rows, cache_prefix):
+        self._X = np.load(features_path, mmap_mode="r")
+        self._y = np.load(target_path, mmap_mode="r")
+        self._batch_rows = batch_rows
+        self._position = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        start = self._position
+        if start >= len(self._y):
+            return False
+        end = start + self._batch_rows
+        input_data(data=np.asarray(self._X[start:end]), label=np.asarray(self._y[start:end]))
+        self._position = end
+        return True
+
+    def reset(self):
+        self._position = 0
 
 class ModelTrainer:
-    def __init__(self):
-        self.model_trainer_config = ModelTrainerConfig()
+    def __init__(self, config=None):
+        self.model_trainer_config = config or ModelTrainerConfig()
+
+    def _cache_folds(self, train_array, groups):
+        """
+        GroupKFold by unit_nr (same leakage rule as DataIngestion's split);
+        each training fold gives up `search_early_stopping_fraction` of its
+        engines as the early-stopping set. Fold matrices are written once to
+        .npy files keyed by a hash of the data, so trials - and later
+        searches on the same data - reuse them.
+        """
+        config = self.model_trainer_config
+        sha = hashlib.sha256()
+        sha.update(np.ascontiguousarray(train_array).tobytes())
+        sha.update(np.ascontiguousarray(groups).tobytes())
+        sha.update(f"{config.search_n_splits}:{config.search_early_stopping_fraction}".encode())
+        cache_dir = os.path.join(config.search_cache_dir, sha.hexdigest()[:16])
+
+        fold_dirs = [os.path.join(cache_dir, f"fold_{k}") for k in range(config.search_n_splits)]
+        if all(os.path.exists(os.path.join(d, "y_val.npy")) for d in fold_dirs):
+            logging.info(f"Reusing cached CV folds from {cache_dir}")
+            os.utime(cache_dir)
+            self._prune_fold_cache(keep=cache_dir)
+            return fold_dirs
 
-    def initiate_model_trainer(self, train_array, test_array):
+        logging.info(f"Caching {config.search_n_splits} grouped CV folds in {cache_dir}")
+        X, y = train_array[:, :-1], train_array[:, -1]
+        splitter = GroupKFold(n_splits=config.search_n_splits)
+        stop_splitter = GroupShuffleSplit(n_splits=1, test_size=config.search_early_stopping_fraction,
+                                          random_state=42)
+        for fold_dir, (train_idx, val_idx) in zip(fold_dirs, splitter.split(X, y, groups)):
+            fit_pos, stop_pos = next(stop_splitter.split(train_idx, groups=groups[train_idx]))
+            fit_idx, stop_idx = train_idx[fit_pos], train_idx[stop_pos]
+            os.makedirs(fold_dir, exist_ok=True)
+            np.save(os.path.join(fold_dir, "X_train.npy"), X[fit_idx])
+            np.save(os.path.join(fold_dir, "y_train.npy"), y[fit_idx])
+            np.save(os.path.join(fold_dir, "X_stop.npy"), X[stop_idx])
+            np.save(os.path.join(fold_dir, "y_stop.npy"), y[stop_idx])
+            np.save(os.path.join(fold_dir, "X_val.npy"), X[val_idx])
+            # Written last: its presence marks the fold as complete
+            np.save(os.path.join(fold_dir, "y_val.npy"), y[val_idx])
+        self._prune_fold_cache(keep=cache_dir)
+        return fold_dirs
+
+    def _prune_fold_cache(self, keep):
+        # Every data or split change hashes to a new fold set: keep only the
+        # `search_cache_keep` most recently used ones
+        root = self.model_trainer_config.search_cache_dir
+        cached = sorted((os.path.join(root, name) for name in os.listdir(root)),
+                        key=os.path.getmtime, reverse=True)
+        cached = [keep] + [path for path in cached if path != keep]
+        for path in cached[max(1, self.model_trainer_config.search_cache_keep):]:
+            shutil.rmtree(path, ignore_errors=True)
+            logging.info(f"Pruned cached CV folds {path}")
+
+    def initiate_hyperparameter_search(self, train_array, groups):
+        """
+        Grid search with grouped K-fold CV, early-stopped on engines held out
+        of each training fold.
+        Trials run in a process pool; each trial gets `search_cores_per_trial`
+        XGBoost threads so workers x threads never exceeds the CPU count.
+        Returns the best params (n_estimators set from early stopping).
+        """
+        try:
+            config = self.model_trainer_config
+            fold_dirs = self._cache_folds(train_array, groups)
+
+            grid = config.search_param_grid
+            trials = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+            cores = max(1, config.search_cores_per_trial)
+            max_workers = config.search_max_workers or max(1, (os.cpu_count() or 1) // cores)
+            logging.info(f"Running {len(trials)} trials on {max_workers} workers x {cores} threads")
+
+            # spawn, not fork: a forked child inheriting OpenMP state can hang XGBoost
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = [
+                    executor.submit(_run_search_trial, params, fold_dirs, cores,
+                                    config.search_max_rounds, config.search_early_stopping_rounds)
+                    for params in trials
+                ]
+                results = [future.result() for future in futures]
+
+            results.sort(key=lambda r: r["rmse_mean"])
+            best = results[0]
+            best_params = dict(best["params"])
+            # best_iteration is 0-based
+            best_params["n_estimators"] = int(round(np.mean(best["best_iterations"]))) + 1
+
+            print(f"Best CV RMSE: {best['rmse_mean']:.4f} with {best_params}")
+            logging.info(f"Hyperparameter search best params: {best_params} (CV RMSE {best['rmse_mean']})")
+
+            os.makedirs(os.path.dirname(config.search_results_file_path), exist_ok=True)
+            with open(config.search_results_file_path, "w") as f:
+                json.dump({"best_params": best_params, "trials": results}, f, indent=2)
+
+            return best_params
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_model_trainer(self, train_array, test_array, model_params=None):
         try:
             logging.info("Split training and test input data")
-            
+
             # The arrays come in as [X, y] combined. We need to slice them.
             # :-1 means "All columns except the last one" (Features)
             # -1 means "Only the last column" (Target/RUL)
@@ -29,12 +233,11 @@ class ModelTrainer:
             X_test, y_test = test_array[:, :-1], test_array[:, -1]
 
             # Initialize XGBoost with the best params from our Notebook
+            # (or from initiate_hyperparameter_search)
             model = XGBRegressor(
-                n_estimators=100, 
-                learning_rate=0.1, 
-                max_depth=6, 
                 n_jobs=-1,
-                random_state=42
+                random_state=42,
+                **(model_params or self.model_trainer_config.model_params)
             )
 
             logging.info("Training XGBoost Model...")
@@ -59,4 +262,94 @@ class ModelTrainer:
             return r2
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def initiate_interval_trainer(self, train_array, test_array, model_params=None):
+        """
+        Fits one XGBoost model with a quantile head per `interval_quantiles`
+        entry (reg:quantileerror), same features and tree params as the point
+        model. The exporter fuses both into one compiled forest, so serving
+        gets every head from a single traversal. Returns the test coverage.
+        """
+        try:
+            config = self.model_trainer_config
+            X_train, y_train = train_array[:, :-1], train_array[:, -1]
+            X_test, y_test = test_array[:, :-1], test_array[:, -1]
+
+            model = XGBRegressor(
+                objective="reg:quantileerror",
+                quantile_alpha=np.asarray(config.interval_quantiles),
+                n_jobs=-1,
+                random_state=42,
+                **(model_params or config.model_params)
+            )
+
+            logging.info(f"Training quantile heads {config.interval_quantiles}...")
+            model.fit(X_train, y_train)
+
+            # Share of test RULs inside [lowest, highest] quantile
+            predicted = np.sort(model.predict(X_test), axis=1)
+            lower, upper = predicted[:, 0], predicted[:, -1]
+            coverage = float(np.mean((y_test >= lower) & (y_test <= upper)))
+            nominal = max(config.interval_quantiles) - min(config.interval_quantiles)
+
+            print(f"Interval Performance -> coverage: {coverage:.3f} (nominal {nominal:.2f}), "
+                  f"mean width: {np.mean(upper - lower):.2f}")
+            logging.info(f"Interval coverage {coverage} (nominal {nominal}), mean width {np.mean(upper - lower)}")
+
+            save_object(file_path=config.interval_model_file_path, obj=model)
+            return coverage
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_external_memory_training(self, train_paths, test_paths, model_params=None):
+        """
+        Trains on the float32 memmaps written by
+        DataTransformation.initiate_chunked_transformation. XGBoost builds its
+        quantized pages from the blocks and keeps them on disk (external
+        memory), so peak RAM does not grow with the number of rows. The
+        booster is saved as an XGBRegressor, like initiate_model_trainer.
+        """
+        try:
+            config = self.model_trainer_config
+            params = dict(model_params or config.model_params)
+            num_boost_round = params.pop("n_estimators", 100)
+            params.update({"objective": "reg:squarederror", "tree_method": "hist", "seed": 42})
+
+            os.makedirs(config.external_cache_dir, exist_ok=True)
+            train_iter = _MemmapBatchIter(*train_paths, config.external_batch_rows,
+                                          os.path.join(config.external_cache_dir, "train"))
+            dtrain = xgb.ExtMemQuantileDMatrix(train_iter)
+
+            logging.info(f"Training XGBoost with external memory ({dtrain.num_row()} rows)...")
+            booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+            del dtrain
+
+            # Same artifact type as the in-memory trainer, for the registry/exporter
+            model = XGBRegressor(n_jobs=-1, random_state=42, **(model_params or config.model_params))
+            model.load_model(bytearray(booster.save_raw("json")))
+            logging.info("Model trained successfully")
+
+            # Evaluate block by block: R2 from running sums
+            X_test = np.load(test_paths[0], mmap_mode="r")
+            y_test = np.load(test_paths[1], mmap_mode="r")
+            n, sse, y_sum, y_sq_sum = 0, 0.0, 0.0, 0.0
+            for start in range(0, len(y_test), config.external_batch_rows):
+                y_block = np.asarray(y_test[start:start + config.external_batch_rows], dtype=np.float64)
+                predicted = model.predict(np.asarray(X_test[start:start + config.external_batch_rows]))
+                sse += float(np.sum((y_block - predicted) ** 2))
+                y_sum += float(y_block.sum())
+                y_sq_sum += float(np.sum(y_block ** 2))
+                n += len(y_block)
+            r2 = 1 - sse / (y_sq_sum - y_sum ** 2 / n)
+            rmse = np.sqrt(sse / n)
+
+            print(f"Model Performance -> R2: {r2:.4f}, RMSE: {rmse:.4f}")
+            logging.info(f"Model Performance -> R2: {r2} RMSE: {rmse}")
+
+            save_object(file_path=config.trained_model_file_path, obj=model)
+            return r2
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import shutil
+from datetime import datetime
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import get_model_version
+
+POINTER_FILE = "CURRENT"
+MODEL_FILE = "model.pkl"
+PREPROCESSOR_FILE = "preprocessor.pkl"
+INTERVAL_MODEL_FILE = "interval_model.pkl"
+COMPILED_DIR = "compiled_model"
+VERSION_META_FILE = "version.json"
+
+@dataclass
+class ModelVersionStoreConfig:
+    versions_dir: str = os.path.join("artifacts", "models")
+    # Older versions beyond this are deleted (the current one never is)
+    keep_versions: int = 5
+
+class ModelVersionStore:
+    """
+    Immutable model versions plus a pointer to the one being served.
+
+    Layout: <versions_dir>/<version>/{model.pkl, preprocessor.pkl,
+    [interval_model.pkl,] compiled_model/, version.json} and <versions_dir>/CURRENT holding the
+    served version id. A version directory is complete before the pointer
+    names it, and the pointer is swapped with os.replace, so readers (the
+    model registry) see either the old or the new version, never a mix.
+    Standard library only: the web process imports it.
+    """
+    def __init__(self, config=None):
+        self.store_config = config or ModelVersionStoreConfig()
+
+    def pointer_path(self):
+        return os.path.join(self.store_config.versions_dir, POINTER_FILE)
+
+    def current(self):
+        """
+        Served version id, or None if nothing was published yet.
+        """
+        try:
+            with open(self.pointer_path()) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def version_paths(self, version):
+        version_dir = os.path.join(self.store_config.versions_dir, version)
+        return {
+            "model_file_path": os.path.join(version_dir, MODEL_FILE),
+            "preprocessor_file_path": os.path.join(version_dir, PREPROCESSOR_FILE),
+            "interval_model_file_path": os.path.join(version_dir, INTERVAL_MODEL_FILE),
+            "compiled_model_dir": os.path.join(version_dir, COMPILED_DIR),
+        }
+
+    def list_versions(self):
+        """
+        Published versions, oldest first.
+        """
+        root = self.store_config.versions_dir
+        if not os.path.isdir(root):
+            return []
+        versions = []
+        for name in os.listdir(root):
+            meta_path = os.path.join(root, name, VERSION_META_FILE)
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    versions.append(json.load(f))
+        return sorted(versions, key=lambda v: v["published_at"])
+
+    def publish(self, model_file_path, preprocessor_file_path, compiled_model_dir=None, metadata=None,
+                interval_model_file_path=None):
+        """
+        Copies the artifacts into a new version directory and points CURRENT
+        at it. Returns the version id (content hash, same as the registry's).
+        """
+        try:
+            root = self.store_config.versions_dir
+            version = get_model_version(model_file_path, preprocessor_file_path, interval_model_file_path)
+            version_dir = os.path.join(root, version)
+
+            if not os.path.exists(os.path.join(version_dir, VERSION_META_FILE)):
+                tmp_dir = version_dir + ".partial"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                os.makedirs(tmp_dir)
+                shutil.copy2(model_file_path, os.path.join(tmp_dir, MODEL_FILE))
+                shutil.copy2(preprocessor_file_path, os.path.join(tmp_dir, PREPROCESSOR_FILE))
+                if interval_model_file_path and os.path.exists(interval_model_file_path):
+                    shutil.copy2(interval_model_file_path, os.path.join(tmp_dir, INTERVAL_MODEL_FILE))
+                if compiled_model_dir and os.path.isdir(compiled_model_dir):
+                    shutil.copytree(compiled_model_dir, os.path.join(tmp_dir, COMPILED_DIR))
+                with open(os.path.join(tmp_dir, VERSION_META_FILE), "w") as f:
+                    json.dump({
+                        "version": version,
+                        "parent": self.current(),
+                        "published_at": datetime.now().isoformat(timespec="microseconds"),
+                        **(metadata or {}),
+                    }, f, indent=2)
+                shutil.rmtree(version_dir, ignore_errors=True)
+                os.rename(tmp_dir, version_dir)
+
+            # --- ATOMIC POINTER SWAP ---
+            tmp_pointer = self.pointer_path() + ".tmp"
+            with open(tmp_pointer, "w") as f:
+                f.write(version)
+            os.replace(tmp_pointer, self.pointer_path())
+            logging.info(f"Published model version {version}")
+
+            self._prune(keep=version)
+            return version
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _prune(self, keep):
+        versions = [v["version"] for v in self.list_versions() if v["version"] != keep]
+        excess = len(versions) + 1 - self.store_config.keep_versions
+        for version in versions[:max(0, excess)]:
+            shutil.rmtree(os.path.join(self.store_config.versions_dir, version), ignore_errors=True)
+            logging.info(f"Pruned model version {version}")
@@ -0,0 +1,141 @@
+"""
+In-process metrics: fixed-bucket histograms, hot-path stage timers and a
+Prometheus text renderer for app.py's /metrics route. Standard library only.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds: 100us .. 2.5s covers a cached hit up to a cold model load
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus style: a value lands in the first
+    bucket whose upper bound is >= value, plus an implicit +Inf bucket).
+    """
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """
+        Cumulative counts per upper bound, like Prometheus' `le` buckets.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + [float("inf")], counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+class HistogramFamily:
+    """
+    One metric name with a histogram per value of a single label
+    (e.g. stage="transform"), created on first use.
+    """
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value):
+        child = self._children.get(value)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(value, Histogram(self.buckets))
+        return child
+
+    def snapshot(self):
+        with self._lock:
+            children = dict(self._children)
+        return {value: child.snapshot() for value, child in sorted(children.items())}
+
+# --- PROCESS-WIDE METRICS ---
+STAGE_LATENCY = HistogramFamily(
+    "engine_stage_latency_seconds", "Wall time of each prediction hot-path stage", "stage")
+REQUEST_LATENCY = HistogramFamily(
+    "engine_request_latency_seconds", "Wall time of each HTTP request", "endpoint")
+
+@contextmanager
+def time_stage(stage, family=STAGE_LATENCY):
+    """
+    Times the enclosed block into `family` under label `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        family.labels(stage).observe(time.perf_counter() - start)
+
+# --- PROMETHEUS TEXT FORMAT (version 0.0.4) ---
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _is_histogram(value):
+    return isinstance(value, dict) and {"buckets", "sum", "count"} <= value.keys()
+
+def _histogram_lines(name, snapshot, labels=None):
+    labels = labels or {}
+    lines = [
+        f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}"
+        for le, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+def render_prometheus(families=(), stats=None):
+    """
+    Renders histogram families plus `stats` ({prefix: stats() dict}) as
+    Prometheus text. Numbers become gauges named engine_<prefix>_<key>,
+    histogram snapshots become histograms and strings are gathered into
+    one engine_<prefix>_info{key="value"} 1 series.
+    """
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help_text}")
+        lines.append(f"# TYPE {family.name} histogram")
+        for value, snapshot in family.snapshot().items():
+            lines.extend(_histogram_lines(family.name, snapshot, {family.label: value}))
+
+    for prefix, values in (stats or {}).items():
+        info = {}
+        for key, value in values.items():
+            name = f"engine_{prefix}_{key}"
+            if _is_histogram(value):
+                lines.append(f"# TYPE {name} histogram")
+                lines.extend(_histogram_lines(name, value))
+            elif isinstance(value, (bool, int, float)):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value)}")
+            elif isinstance(value, str):
+                info[key] = value
+        if info:
+            lines.append(f"# TYPE engine_{prefix}_info gauge")
+            lines.append(f"engine_{prefix}_info{_format_labels(info)} 1")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import Histogram
+
+@dataclass
+class MicroBatchConfig:
+    # A batch is dispatched when it is full or its oldest request waited this long
+    max_batch_size: int = 64
+    max_wait_ms: float = 2.0
+    # Requests beyond this are rejected instead of queueing forever
+    max_queue_size: int = 10000
+
+class MicroBatchScheduler:
+    """
+    Coalesces concurrent single-row predictions into micro-batches.
+
+    Request threads submit one feature row and block on a Future; a single
+    worker thread drains the queue into batches bounded by size and max wait,
+    runs one predict call per batch and resolves every caller's Future.
+    """
+    def __init__(self, predict_fn, config=None):
+        self.predict_fn = predict_fn
+        self.scheduler_config = config or MicroBatchConfig()
+        self._queue = queue.Queue(maxsize=self.scheduler_config.max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # --- METRICS ---
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_depth_histogram = Histogram([0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 1024])
+        self.queue_wait_histogram = Histogram([0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1])
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _ensure_worker(self):
+        # Started lazily and per process: threads do not survive a gunicorn fork
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive() or self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+
+    def submit(self, feature_row):
+        """
+        Queues one feature row; returns a Future resolving to its prediction.
+        """
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((np.asarray(feature_row, dtype=np.float64), future, time.perf_counter()))
+        except queue.Full:
+            raise CustomException(RuntimeError("Prediction queue is full"), sys)
+        return future
+
+    def predict(self, feature_row, timeout=None):
+        return self.submit(feature_row).result(timeout=timeout)
+
+    def _collect_batch(self):
+        # Block for the first request, then wait at most max_wait for company
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.scheduler_config.max_wait_ms / 1000
+        while len(batch) < self.scheduler_config.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Anything already queued is taken without waiting
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            self.queue_depth_histogram.observe(self._queue.qsize())
+            self.batch_size_histogram.observe(len(batch))
+
+            rows, futures, enqueued = zip(*batch)
+            start = time.perf_counter()
+            for t in enqueued:
+                self.queue_wait_histogram.observe(start - t)
+
+            try:
+                preds = self.predict_fn(np.vstack(rows))
+                for future, pred in zip(futures, preds):
+                    future.set_result(pred)
+            except Exception as e:
+                self.errors += 1
+                logging.info(f"Micro-batch of {len(batch)} failed: {e}")
+                for future in futures:
+                    future.set_exception(e)
+
+            self.requests += len(batch)
+            self.batches += 1
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_depth_at_dispatch": self.queue_depth_histogram.snapshot(),
+            "queue_wait_seconds": self.queue_wait_histogram.snapshot(),
+        }
@@ -0,0 +1,188 @@
+"""
+Pure-NumPy inference runtime for the exported model (see
+src/components/model_exporter.py). Importing this module pulls in NumPy only:
+no pandas, sklearn or xgboost, so web workers start fast.
+"""
+import os
+import json
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+class CompiledPreprocessor:
+    """
+    Drop-in for the fitted sklearn Pipeline (median imputer + StandardScaler).
+    """
+    def __init__(self, feature_names, impute_values, mean, scale):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.impute_values = impute_values
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_pipeline(cls, preprocessor):
+        """
+        Same transform from a fitted sklearn Pipeline(imputer, scaler), read
+        off its fitted attributes (no sklearn import needed here).
+        """
+        imputer = preprocessor.named_steps["imputer"]
+        scaler = preprocessor.named_steps["scaler"]
+        if imputer.strategy != "median" or not (scaler.with_mean and scaler.with_std):
+            raise ValueError("Only the median imputer + StandardScaler pipeline can be compiled")
+        return cls(
+            [str(c) for c in preprocessor.feature_names_in_],
+            np.asarray(imputer.statistics_, dtype=np.float64),
+            np.asarray(scaler.mean_, dtype=np.float64),
+            np.asarray(scaler.scale_, dtype=np.float64),
+        )
+
+    def transform(self, X):
+        # DataFrames are reordered by name, arrays must already be in order
+        if hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=np.float64)
+        X = np.array(X, dtype=np.float64, ndmin=2)
+
+        # Same float64 operations as SimpleImputer + StandardScaler.transform
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.broadcast_to(self.impute_values, X.shape)[missing]
+        X -= self.mean
+        X /= self.scale
+        # XGBoost compares features in float32
+        return X.astype(np.float32)
+
+def order_interval(point, quantile_heads):
+    """
+    (point, lower, upper) from the point prediction and the quantile heads
+    (rows x quantiles). Heads are sorted per row (independently fitted
+    quantiles can cross) and the bounds widened to contain the point RUL.
+    """
+    heads = np.sort(np.asarray(quantile_heads).reshape(len(point), -1), axis=1)
+    return point, np.minimum(heads[:, 0], point), np.maximum(heads[:, -1], point)
+
+class CompiledTrees:
+    """
+    Drop-in for XGBRegressor.predict on a gbtree model.
+
+    All trees live in flat node arrays. Leaves point to themselves, so every
+    row can be pushed down every tree for `max_depth` steps with no branching:
+    one vectorized gather/compare per level instead of per-node Python code.
+
+    With quantile heads (meta "quantiles", see ModelExporter), output 0 is
+    the point RUL: predict() walks only its trees, predict_interval() walks
+    the whole forest once and returns every head from that single pass.
+    """
+    # Rows per traversal block: bounds the (rows x trees) working arrays
+    block_rows = 4096
+
+    def __init__(self, arrays, meta):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.default_left = arrays["default_left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.tree_group = arrays["tree_group"]
+        self.base_score = np.asarray(meta["base_score"], dtype=np.float32)
+        self.max_depth = int(meta["max_depth"])
+        self.n_outputs = len(self.base_score)
+        self.quantiles = list(meta.get("quantiles", []))
+        # Trees feeding each output, in boosting order
+        self.group_trees = [np.flatnonzero(self.tree_group == g) for g in range(self.n_outputs)]
+
+        all_outputs = list(range(self.n_outputs))
+        self._all_plan = self._plan(all_outputs)
+        self._point_plan = self._plan([0]) if self.quantiles else self._all_plan
+
+    def _plan(self, groups):
+        # Roots to traverse, and where each group's trees sit among them
+        trees = np.concatenate([self.group_trees[g] for g in groups])
+        positions, start = [], 0
+        for g in groups:
+            positions.append((g, np.arange(start, start + len(self.group_trees[g]))))
+            start += len(self.group_trees[g])
+        return self.roots[trees], positions
+
+    def _leaf_values(self, X, roots):
+        n_rows, n_features = X.shape
+        node = np.broadcast_to(roots, (n_rows, len(roots))).copy()
+        # Flat gathers are cheaper than 2-D fancy indexing
+        X_flat = np.ascontiguousarray(X).ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, None]
+        # Imputed rows have no NaN: skip the default-direction lookups then
+        has_missing = bool(np.isnan(X_flat).any())
+        for _ in range(self.max_depth):
+            x = X_flat[row_offset + self.feature[node]]
+            go_left = x < self.threshold[node]
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def _predict_plan(self, X, plan):
+        roots, positions = plan
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty((X.shape[0], len(positions)), dtype=np.float32)
+
+        for start in range(0, X.shape[0], self.block_rows):
+            leaves = self._leaf_values(X[start:start + self.block_rows], roots)
+            for j, (g, trees) in enumerate(positions):
+                # base_score, then tree 0, 1, ... accumulated in float32: cumsum
+                # is sequential, so this matches XGBoost's summation order exactly
+                terms = np.empty((leaves.shape[0], len(trees) + 1), dtype=np.float32)
+                terms[:, 0] = self.base_score[g]
+                terms[:, 1:] = leaves[:, trees]
+                out[start:start + self.block_rows, j] = np.cumsum(terms, axis=1)[:, -1]
+        return out
+
+    def predict(self, X):
+        out = self._predict_plan(X, self._point_plan)
+        return out[:, 0] if out.shape[1] == 1 else out
+
+    def predict_heads(self, X):
+        """
+        Every output (point, then one per quantile) from one traversal.
+        """
+        return self._predict_plan(X, self._all_plan)
+
+    def predict_interval(self, X):
+        heads = self.predict_heads(X)
+        return order_interval(heads[:, 0], heads[:, 1:])
+
+class CompiledModel:
+    """
+    Loads an exported model directory: flat .npy arrays + meta.json.
+    """
+    def __init__(self, model_dir, mmap_mode=None):
+        self.model_dir = model_dir
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        # Memory-mapped arrays are backed by the page cache, so every worker
+        # process maps the same physical pages. np.asarray drops the memmap
+        # subclass (no copy), which would otherwise wrap every result array.
+        arrays = {
+            name: np.asarray(np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in self.meta["arrays"]
+        }
+        self.preprocessor = CompiledPreprocessor(
+            self.meta["feature_names"], arrays["impute_values"], arrays["mean"], arrays["scale"])
+        self.model = CompiledTrees(arrays, self.meta)
+
+    @property
+    def source_version(self):
+        return self.meta.get("source_version")
+
+    def predict(self, features):
+        return self.model.predict(self.preprocessor.transform(features))
+
+    def predict_heads(self, features):
+        return self.model.predict_heads(self.preprocessor.transform(features))
+
+    def predict_interval(self, features):
+        return self.model.predict_interval(self.preprocessor.transform(features))
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tracemalloc
+from datetime import datetime
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.components.data_ingestion import read_raw_file
+from src.components.data_transformation import DataTransformation
+from src.pipelines.model_registry import ModelRegistry
+
+@dataclass
+class ModelEvaluationConfig:
+    # Official C-MAPSS test trajectories (cut before failure) and their true RUL
+    test_data_file: str = os.path.join('data', 'raw', 'test_FD001.txt')
+    rul_data_file: str = os.path.join('data', 'raw', 'RUL_FD001.txt')
+    report_file_path: str = os.path.join('artifacts', 'evaluation_report.json')
+    # tracemalloc gives per-stage peak memory but slows allocations a little
+    trace_memory: bool = True
+
+def nasa_score(y_true, y_pred):
+    """
+    PHM08 / C-MAPSS asymmetric scoring function (lower is better).
+    Late predictions (pred > true) are penalised harder than early ones.
+    """
+    d = np.asarray(y_pred, dtype=float) - np.asarray(y_true, dtype=float)
+    return float(np.sum(np.where(d < 0, np.exp(-d / 13) - 1, np.exp(d / 10) - 1)))
+
+class ModelEvaluation:
+    def __init__(self, config=None, registry=None):
+        self.evaluation_config = config or ModelEvaluationConfig()
+        # A private registry: evaluation should measure a cold model load
+        self.registry = registry or ModelRegistry()
+        self.timings = {}
+        self.peak_memory = {}
+
+    def _run_stage(self, name, fn, *args):
+        trace = self.evaluation_config.trace_memory
+        if trace:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = fn(*args)
+        self.timings[name] = time.perf_counter() - start
+        if trace:
+            self.peak_memory[name] = tracemalloc.get_traced_memory()[1]
+        logging.info(f"Evaluation stage '{name}' took {self.timings[name]:.4f}s")
+        return result
+
+    def initiate_model_evaluation(self):
+        logging.info("Entered the model evaluation component")
+        config = self.evaluation_config
+        try:
+            if config.trace_memory:
+                tracemalloc.start()
+
+            # --- STEP 1: LOAD MODEL + TEST DATA ---
+            model, preprocessor = self._run_stage("load_model", self.registry.get)
+            test_df = self._run_stage("ingest", read_raw_file, config.test_data_file)
+            true_rul = np.loadtxt(config.rul_data_file, ndmin=1)
+
+            # --- STEP 2: FEATURES (same code path as training) ---
+            feature_df = self._run_stage("features", DataTransformation().add_features, test_df)
+
+            # --- STEP 3: TRANSFORM + PREDICT EVERY CYCLE IN ONE BATCH ---
+            columns = list(preprocessor.feature_names_in_)
+            data_scaled = self._run_stage("transform", preprocessor.transform, feature_df[columns])
+            preds = self._run_stage("predict", model.predict, data_scaled)
+
+            # --- STEP 4: SCORE THE LAST CYCLE OF EVERY ENGINE ---
+            # RUL_FD001.txt line i is the true RUL of engine i + 1 at its last cycle
+            last_rows = feature_df.reset_index(drop=True).groupby('unit_nr')['time_cycles'].idxmax()
+            last_preds = preds[last_rows.to_numpy()]
+            if len(last_preds) != len(true_rul):
+                raise ValueError(
+                    f"{len(last_preds)} test engines but {len(true_rul)} true RUL values")
+
+            errors = last_preds - true_rul
+            metrics = {
+                "rmse": float(np.sqrt(np.mean(errors ** 2))),
+                "mae": float(np.mean(np.abs(errors))),
+                "nasa_score": nasa_score(true_rul, last_preds),
+            }
+
+            if config.trace_memory:
+                tracemalloc.stop()
+
+            # --- STEP 5: WRITE THE REPORT ---
+            total_predict_path = sum(self.timings[s] for s in ("features", "transform", "predict"))
+            report = {
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "model_version": self.registry.version,
+                "config": asdict(config),
+                "n_engines": int(len(true_rul)),
+                "n_rows": int(len(feature_df)),
+                "metrics": metrics,
+                "timings_seconds": self.timings,
+                "rows_per_second": len(feature_df) / total_predict_path,
+                "peak_traced_memory_bytes": self.peak_memory,
+                # ru_maxrss is KiB on Linux
+                "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            }
+
+            os.makedirs(os.path.dirname(config.report_file_path) or ".", exist_ok=True)
+            with open(config.report_file_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+            print(f"Test Set Performance -> RMSE: {metrics['rmse']:.4f}, NASA score: {metrics['nasa_score']:.2f}")
+            logging.info(f"Evaluation report written to {config.report_file_path}: {metrics}")
+
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    defaults = ModelEvaluationConfig()
+    parser = argparse.ArgumentParser(description="Score the model on the official C-MAPSS test set")
+    parser.add_argument("--test-file", default=defaults.test_data_file)
+    parser.add_argument("--rul-file", default=defaults.rul_data_file)
+    parser.add_argument("--report", default=defaults.report_file_path)
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="skip tracemalloc for slightly more accurate timings")
+    args = parser.parse_args()
+
+    evaluation = ModelEvaluation(ModelEvaluationConfig(
+        test_data_file=args.test_file,
+        rul_data_file=args.rul_file,
+        report_file_path=args.report,
+        trace_memory=not args.no_trace_memory,
+    ))
+    evaluation.initiate_model_evaluation()
@@ -0,0 +1,167 @@
+import time
+import bisect
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.pipelines.predict_pipeline import HEALTH_BANDS, get_health_status
+
+@dataclass
+class FleetIndexConfig:
+    # Hard cap on engines kept; the least recently scored one is evicted
+    max_units: int = 100000
+    # Updates with this many rows re-sort the whole index instead of
+    # inserting row by row (each insert shifts half the list on average)
+    bulk_update_rows: int = 1024
+
+class FleetHealthIndex:
+    """
+    Latest predicted RUL per unit_nr, kept sorted for fleet queries.
+
+    `_ruls` is a sorted list of RULs and `_units` the unit at the same
+    position, so top-k is a slice and band/range queries are two bisects
+    (O(log n) to locate, plus the rows returned). An update of a known unit
+    removes its old entry first; large updates (a whole fleet batch) re-sort
+    once instead. `_latest` (LRU order) holds each unit's current RUL and
+    scoring time. Only methods are used by callers, so the index also works
+    as one shared instance behind a proxy (src/pipelines/shared_state.py).
+    """
+    def __init__(self, config=None):
+        self.index_config = config or FleetIndexConfig()
+        self._lock = threading.Lock()
+        self._ruls = []
+        self._units = []
+        self._latest = OrderedDict()  # unit_nr -> (rul, updated_at)
+        self.updates = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def _remove(self, unit):
+        rul, _ = self._latest.pop(unit)
+        # Equal RULs are adjacent: scan only that run for the unit
+        position = bisect.bisect_left(self._ruls, rul)
+        while self._units[position] != unit:
+            position += 1
+        del self._ruls[position]
+        del self._units[position]
+
+    def update(self, units, ruls, now=None):
+        """
+        Records the latest RUL of every unit (as scored by batch or stream).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if len(units) >= self.index_config.bulk_update_rows:
+                self._bulk_update(units, ruls, now)
+                return
+            for unit, rul in zip(units, ruls):
+                rul = float(rul)
+                if unit in self._latest:
+                    self._remove(unit)
+                elif len(self._latest) >= self.index_config.max_units:
+                    self._remove(next(iter(self._latest)))
+                    self.evictions += 1
+
+                position = bisect.bisect_right(self._ruls, rul)
+                self._ruls.insert(position, rul)
+                self._units.insert(position, unit)
+                self._latest[unit] = (rul, now)
+            self.updates += len(units)
+
+    def _bulk_update(self, units, ruls, now):
+        # Caller holds the lock
+        for unit, rul in zip(units, ruls):
+            if unit in self._latest:
+                self._latest.move_to_end(unit)
+            elif len(self._latest) >= self.index_config.max_units:
+                self._latest.popitem(last=False)
+                self.evictions += 1
+            self._latest[unit] = (float(rul), now)
+        ordered = sorted(self._latest.items(), key=lambda item: item[1][0])
+        self._units = [unit for unit, _ in ordered]
+        self._ruls = [rul for _, (rul, _) in ordered]
+        self.updates += len(units)
+
+    def _entries(self, start, stop, reverse=False):
+        # Caller holds the lock
+        positions = range(stop - 1, start - 1, -1) if reverse else range(start, stop)
+        entries = []
+        for i in positions:
+            unit, rul = self._units[i], self._ruls[i]
+            entries.append({
+                "unit_nr": unit,
+                "rul": rul,
+                "status": get_health_status(rul)["status"],
+                "updated_at": self._latest[unit][1],
+            })
+        return entries
+
+    def top_k(self, k, lowest=True):
+        """
+        The k engines with the lowest (default) or highest RUL.
+        """
+        with self._lock:
+            k = max(0, min(k, len(self._ruls)))
+            if lowest:
+                return self._entries(0, k)
+            return self._entries(len(self._ruls) - k, len(self._ruls), reverse=True)
+
+    def range(self, min_rul=None, max_rul=None, limit=None):
+        """
+        Engines with min_rul <= RUL <= max_rul, lowest RUL first.
+        Returns (total matching, entries truncated to `limit`).
+        """
+        with self._lock:
+            start = 0 if min_rul is None else bisect.bisect_left(self._ruls, min_rul)
+            stop = len(self._ruls) if max_rul is None else bisect.bisect_right(self._ruls, max_rul)
+            stop = max(start, stop)
+            total = stop - start
+            if limit is not None:
+                stop = min(stop, start + max(0, limit))
+            return total, self._entries(start, stop)
+
+    @staticmethod
+    def band_bounds(status):
+        """
+        (exclusive lower, inclusive upper) RUL bounds of a HEALTH_BANDS status.
+        """
+        upper = float("inf")
+        for lower, band_status, *_ in HEALTH_BANDS:
+            if band_status == status:
+                return lower, upper
+            upper = lower
+        raise ValueError(f"Unknown status '{status}', expected one of {[b[1] for b in HEALTH_BANDS]}")
+
+    def band(self, status, limit=None):
+        """
+        Engines in one status band, lowest RUL first. Returns (total, entries).
+        """
+        lower, upper = self.band_bounds(status)
+        with self._lock:
+            start = bisect.bisect_right(self._ruls, lower)
+            stop = bisect.bisect_right(self._ruls, upper)
+            total = stop - start
+            if limit is not None:
+                stop = min(stop, start + max(0, limit))
+            return total, self._entries(start, stop)
+
+    def band_counts(self):
+        counts = {}
+        with self._lock:
+            for _, status, *_ in HEALTH_BANDS:
+                lower, upper = self.band_bounds(status)
+                counts[status] = bisect.bisect_right(self._ruls, upper) - bisect.bisect_right(self._ruls, lower)
+        return counts
+
+    def stats(self):
+        counts = self.band_counts()
+        with self._lock:
+            return {
+                "units": len(self._latest),
+                "max_units": self.index_config.max_units,
+                "updates": self.updates,
+                "evictions": self.evictions,
+                **{f"band_{status.lower().replace(' ', '_')}": n for status, n in counts.items()},
+            }
@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import time
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, get_model_version
+from src.components.feature_schema import FeatureLayout
+from src.components.model_versions import ModelVersionStore, ModelVersionStoreConfig
+from src.pipelines.compiled_model import CompiledModel, CompiledPreprocessor, META_FILE, order_interval
+
+class NativeIntervalModel:
+    """
+    predict_interval() for the pickled runtime. Like the compiled forest, the
+    point model and the multi-quantile model are merged into one
+    multi-output booster (output 0 = RUL), so every batch is one predict call.
+    """
+    def __init__(self, model, interval_model):
+        # Only reached once the pickles (and so xgboost) are loaded anyway
+        from src.components.model_exporter import merge_boosters
+
+        self.model = model
+        self.interval_model = interval_model
+        self.quantiles = [float(q) for q in np.atleast_1d(interval_model.get_params()["quantile_alpha"])]
+        self.booster = merge_boosters(model, interval_model)
+
+    def predict_interval(self, X):
+        outputs = self.booster.inplace_predict(X)
+        return order_interval(outputs[:, 0], outputs[:, 1:])
+
+class RowCountDispatch:
+    """
+    The "auto" runtime: the compiled forest for batches of up to `max_rows`
+    rows (form posts, small micro-batches), where it avoids xgboost's
+    per-call overhead, and the native booster for larger ones, where
+    XGBoost's predictor is several times faster than walking every row
+    through every tree in NumPy. The pickles (and xgboost) are only loaded
+    by the first large batch, or by load_native() (the gunicorn master with
+    PRELOAD_NATIVE=1); if that fails, the compiled runtime keeps serving
+    every size.
+    """
+    def __init__(self, compiled, load_native, max_rows):
+        self.compiled = compiled
+        self.quantiles = compiled.quantiles
+        self.max_rows = max_rows
+        self._load_native = load_native
+        self._native = None
+        self._native_error = None
+        self._lock = threading.Lock()
+        self.compiled_batches = 0
+        self.native_batches = 0
+
+    def load_native(self):
+        """
+        Loads the native booster(s) now (once); returns whether they loaded.
+        """
+        if self._native is None and self._native_error is None:
+            with self._lock:
+                if self._native is None and self._native_error is None:
+                    try:
+                        self._native = self._load_native()
+                    except Exception as e:
+                        self._native_error = str(e)
+                        logging.info(f"Native runtime unavailable, compiled serves every batch: {e}")
+        return self._native is not None
+
+    def _native_for(self, X, interval=False):
+        # (model or interval model) to use for X, None for the compiled forest
+        if len(X) > self.max_rows:
+            if self.load_native():
+                native = self._native[1 if interval else 0]
+                if native is not None:
+                    self.native_batches += 1
+                    return native
+        self.compiled_batches += 1
+        return None
+
+    def predict(self, X):
+        native = self._native_for(X)
+        return self.compiled.predict(X) if native is None else native.predict(X)
+
+    def predict_interval(self, X):
+        native = self._native_for(X, interval=True)
+        return self.compiled.predict_interval(X) if native is None else native.predict_interval(X)
+
+    def stats(self):
+        return {
+            "compiled_max_rows": self.max_rows,
+            "compiled_batches": self.compiled_batches,
+            "native_batches": self.native_batches,
+            "native_loaded": self._native is not None,
+        }
+
+@dataclass
+class ModelRegistryConfig:
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    # Optional quantile heads for lower/upper RUL bounds (not required to serve)
+    interval_model_file_path: str = os.path.join("artifacts", "interval_model.pkl")
+    compiled_model_dir: str = os.path.join("artifacts", "compiled_model")
+    # Published versions (ModelVersionStore): when its CURRENT pointer exists,
+    # the version it names is served instead of the paths above
+    versions_dir: str = os.path.join("artifacts", "models")
+    # "auto"     -> if the export matches the pickles: NumPy runtime for batches
+    #               of up to compiled_max_rows rows, native booster above
+    #               (RowCountDispatch); else pickles only
+    # "compiled" -> NumPy runtime only, every batch size (error if missing or stale)
+    # "native"   -> always unpickle sklearn + xgboost
+    runtime: str = "auto"
+    # Crossover of the two runtimes (benchmarks/bench_runtimes.py): the NumPy
+    # traversal costs O(rows x trees x depth) gathers, xgboost a fixed call
+    # overhead plus a much cheaper per-row cost
+    compiled_max_rows: int = 16
+    # Artifacts are memory-mapped read-only (compiled .npy arrays, NumPy arrays
+    # inside the pickles): forked gunicorn workers share one copy (None = load)
+    mmap_mode: str = "r"
+    # How often (seconds) we stat the artifacts to look for a retrained model.
+    # 0 means "check on every request".
+    reload_check_interval: float = 2.0
+
+class ModelRegistry:
+    """
+    Process-wide cache for the trained model and preprocessor.
+
+    Artifacts are deserialized once per worker and reused by every request.
+    When train_pipeline.py writes new pickles, the mtime change is noticed,
+    the files are hashed and - if the content really changed - reloaded
+    without restarting the server.
+
+    If ModelExporter has written a compiled copy of exactly these pickles, the
+    pure-NumPy runtime serves small batches without importing sklearn/xgboost;
+    large batches go to the native booster, unpickled on first need
+    (RowCountDispatch).
+
+    Once a version has been published to the ModelVersionStore, the registry
+    follows its CURRENT pointer: swapping the pointer switches every worker
+    to the new version on its next check.
+    """
+    def __init__(self, config=None):
+        self.registry_config = config or ModelRegistryConfig()
+        self.version_store = ModelVersionStore(
+            ModelVersionStoreConfig(versions_dir=self.registry_config.versions_dir))
+        self._lock = threading.Lock()
+
+        self._model = None
+        self._preprocessor = None
+        self._array_preprocessor = None
+        self._interval_model = None
+        self._fingerprint = None
+        self._last_check = 0.0
+
+        # --- COUNTERS (exposed through stats()) ---
+        self.version = None
+        self.runtime = None
+        self.layout = None
+        self.loaded_at = None
+        self.load_count = 0
+        self.last_load_seconds = 0.0
+        self.total_load_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.reload_errors = 0
+
+    def _resolve_paths(self):
+        """
+        Artifact paths to serve: the published CURRENT version if there is
+        one, else the plain paths from the config.
+        """
+        version = self.version_store.current()
+        if version is not None:
+            return self.version_store.version_paths(version)
+        return {
+            "model_file_path": self.registry_config.model_file_path,
+            "preprocessor_file_path": self.registry_config.preprocessor_file_path,
+            "interval_model_file_path": self.registry_config.interval_model_file_path,
+            "compiled_model_dir": self.registry_config.compiled_model_dir,
+        }
+
+    def _stat_fingerprint(self, paths):
+        # Cheap check: (mtime, size) of the version pointer and every artifact,
+        # incl. the compiled export
+        files = [
+            self.version_store.pointer_path(),
+            paths["model_file_path"],
+            paths["preprocessor_file_path"],
+            paths["interval_model_file_path"],
+            os.path.join(paths["compiled_model_dir"], META_FILE),
+        ]
+        return tuple(
+            (os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+            for path in files
+        )
+
+    def _compiled_source_version(self, compiled_model_dir):
+        meta_path = os.path.join(compiled_model_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f).get("source_version")
+
+    def _load_native(self, paths, version):
+        """
+        (model, preprocessor, interval model or None) unpickled from `paths`,
+        which must still hold `version` (a retrain may have replaced them).
+        """
+        if get_model_version(paths["model_file_path"], paths["preprocessor_file_path"],
+                             paths["interval_model_file_path"]) != version:
+            raise ValueError(f"Artifacts no longer hold model version {version}")
+        mmap_mode = self.registry_config.mmap_mode
+        model = load_object(file_path=paths["model_file_path"], mmap_mode=mmap_mode)
+        preprocessor = load_object(file_path=paths["preprocessor_file_path"], mmap_mode=mmap_mode)
+        interval_model = None
+        if os.path.exists(paths["interval_model_file_path"]):
+            interval_model = NativeIntervalModel(
+                model, load_object(file_path=paths["interval_model_file_path"], mmap_mode=mmap_mode))
+        return model, preprocessor, interval_model
+
+    def _load(self, fingerprint, paths):
+        runtime = self.registry_config.runtime
+        version = get_model_version(
+            paths["model_file_path"], paths["preprocessor_file_path"], paths["interval_model_file_path"])
+        use_compiled = runtime != "native" and self._compiled_source_version(paths["compiled_model_dir"]) == version
+        if runtime == "compiled" and not use_compiled:
+            raise ValueError(
+                f"runtime='compiled' but {paths['compiled_model_dir']} "
+                f"is missing or was not exported from model version {version}")
+        new_runtime = "compiled" if use_compiled else "native"
+
+        if self._model is not None and version == self.version and new_runtime == self.runtime:
+            # File was touched/rewritten with identical bytes: nothing to do
+            logging.info(f"Artifacts touched but unchanged (version {version})")
+            self._fingerprint = fingerprint
+            return
+
+        logging.info(f"Loading model and preprocessor (version {version}, {new_runtime} runtime)...")
+        start = time.perf_counter()
+        if use_compiled:
+            compiled = CompiledModel(paths["compiled_model_dir"], mmap_mode=self.registry_config.mmap_mode)
+            model, preprocessor = compiled.model, compiled.preprocessor
+            array_preprocessor = preprocessor
+            if runtime == "auto":
+                def load_native():
+                    native_model, _, native_interval_model = self._load_native(paths, version)
+                    return native_model, native_interval_model
+                model = RowCountDispatch(model, load_native, self.registry_config.compiled_max_rows)
+            interval_model = model if model.quantiles else None
+        else:
+            model, preprocessor, interval_model = self._load_native(paths, version)
+            array_preprocessor = CompiledPreprocessor.from_pipeline(preprocessor)
+        # Column order the request path fills rows in; refuses a preprocessor
+        # whose features differ from what DataTransformation produces
+        layout = FeatureLayout.from_preprocessor(preprocessor)
+        elapsed = time.perf_counter() - start
+
+        self._model = model
+        self._preprocessor = preprocessor
+        self._array_preprocessor = array_preprocessor
+        self._interval_model = interval_model
+        self.layout = layout
+        self._fingerprint = fingerprint
+        self.version = version
+        self.runtime = new_runtime
+        self.loaded_at = time.time()
+        self.load_count += 1
+        self.last_load_seconds = elapsed
+        self.total_load_seconds += elapsed
+        logging.info(f"Model version {version} loaded in {elapsed:.4f}s")
+
+    def _refresh(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        loaded = self._model is not None
+        interval = self.registry_config.reload_check_interval
+
+        if loaded and now - self._last_check < interval:
+            self.cache_hits += 1
+            return
+
+        self._last_check = now
+        try:
+            paths = self._resolve_paths()
+            fingerprint = self._stat_fingerprint(paths)
+            if loaded and fingerprint == self._fingerprint:
+                self.cache_hits += 1
+                return
+
+            self.cache_misses += 1
+            self._load(fingerprint, paths)
+
+        except Exception as e:
+            # A retrain may be half-way through writing the pickles.
+            # Keep serving the previous model and retry on the next check.
+            if not loaded:
+                raise
+            self.reload_errors += 1
+            logging.info(f"Model reload failed, keeping version {self.version}: {e}")
+
+    def get(self):
+        """
+        Returns (model, preprocessor), loading them on first use and
+        hot-reloading them when the files on disk change.
+        """
+        model, preprocessor, _ = self.get_with_version()
+        return model, preprocessor
+
+    def get_with_version(self):
+        """
+        Like get(), plus the version those objects were loaded from
+        (read under the same lock, so it always matches them).
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                return self._model, self._preprocessor, self.version
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_array_path(self):
+        """
+        Returns (model, array_preprocessor, layout, version) for callers that
+        already hold feature rows as NumPy arrays in `layout` order: the
+        preprocessor is a CompiledPreprocessor, so no DataFrame is needed.
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                return self._model, self._array_preprocessor, self.layout, self.version
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_interval_path(self):
+        """
+        Like get_array_path(), but the model has predict_interval() returning
+        (point, lower, upper); it is None when the served version has no
+        quantile heads.
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                return self._interval_model, self._array_preprocessor, self.layout, self.version
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def load_native_runtime(self):
+        """
+        Under runtime="auto", unpickles the native booster behind large
+        batches now rather than on the first one, so a gunicorn master can
+        load it before forking and the workers share it. Returns whether the
+        native runtime is loaded.
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                model = self._model
+            return model.load_native() if isinstance(model, RowCountDispatch) else self.runtime == "native"
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "runtime": self.runtime,
+                "quantiles": self._interval_model.quantiles if self._interval_model is not None else [],
+                "loaded_at": self.loaded_at,
+                "load_count": self.load_count,
+                "last_load_seconds": self.last_load_seconds,
+                "total_load_seconds": self.total_load_seconds,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "reload_errors": self.reload_errors,
+                **(self._model.stats() if isinstance(self._model, RowCountDispatch) else {}),
+            }
+
+# --- PROCESS-WIDE INSTANCE ---
+# One registry per (gunicorn worker) process, shared by every PredictPipeline.
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
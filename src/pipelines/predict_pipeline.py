@@ -1,37 +1,141 @@
 import sys
+import numpy as np
 import pandas as pd
-import os
 from src.exception import CustomException
-from src.utils import load_object
-from src.logger import logging
+from src.components.feature_schema import FEATURE_COLUMNS, FEATURE_LAYOUT, INPUT_SENSORS
+from src.pipelines.model_registry import get_model_registry
+from src.metrics import time_stage
+
+# --- HEALTH STATUS BANDS ---
+# (exclusive lower RUL bound, status, message, bootstrap color, icon)
+HEALTH_BANDS = [
+    (150, "HEALTHY", "Optimal Operations", "success", "fa-check-circle"),
+    (50, "DEGRADATION", "Fault Propagation Detected", "warning", "fa-exclamation-triangle"),
+    (float("-inf"), "FAILURE IMMINENT", "System Termination Risk", "danger", "fa-radiation"),
+]
+
+def get_health_status(rul):
+    """
+    Maps one RUL value to its band: dict with status, msg, color and icon.
+    """
+    for lower, status, msg, color, icon in HEALTH_BANDS:
+        if rul > lower:
+            return {"status": status, "msg": msg, "color": color, "icon": icon}
+
+def get_health_status_array(ruls):
+    """
+    Vectorized version of get_health_status: array of RULs -> array of status labels.
+    """
+    ruls = np.asarray(ruls)
+    conditions = [ruls > lower for lower, *_ in HEALTH_BANDS]
+    labels = [status for _, status, *_ in HEALTH_BANDS]
+    return np.select(conditions, labels, default=HEALTH_BANDS[-1][1])
+
+def validate_unit_id(unit):
+    """
+    unit_nr keys the stream windows and the fleet index: only ints and
+    strings are accepted (no null, bool, float, list or object).
+    """
+    if isinstance(unit, bool) or not isinstance(unit, (int, str)):
+        raise ValueError(f"unit_nr must be an integer or a string, got {type(unit).__name__}")
+    return unit
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry=None, cache=None):
+        # Model + preprocessor are cached per process, not loaded per request
+        self.registry = registry or get_model_registry()
+        # Optional PredictionCache: repeated feature rows skip transform + predict
+        self.cache = cache
 
     def predict(self, features):
         try:
-            # 1. Define paths
-            model_path = os.path.join("artifacts", "model.pkl")
-            preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
-            
-            logging.info("Loading model and preprocessor...")
-            model = load_object(file_path=model_path)
-            preprocessor = load_object(file_path=preprocessor_path)
-            
-            # 2. Scale the Input Data
-            logging.info("Scaling input data...")
-            data_scaled = preprocessor.transform(features)
-            
-            # 3. Predict
-            logging.info("Making prediction...")
-            preds = model.predict(data_scaled)
-            
+            if hasattr(features, "columns") and self.cache is None:
+                # 1. Fetch the (cached) model and preprocessor
+                with time_stage("load_model"):
+                    model, preprocessor, _ = self.registry.get_with_version()
+                return self._predict(model, preprocessor, features)
+
+            # NumPy path: rows in the model's FeatureLayout order, no pandas
+            with time_stage("load_model"):
+                model, preprocessor, layout, version = self.registry.get_array_path()
+            X = self._as_rows(features, layout)
+
+            if self.cache is None:
+                return self._predict(model, preprocessor, X)
+
+            # 2. Serve repeated rows from the prediction cache
+            with time_stage("cache_lookup"):
+                keys = self.cache.make_keys(X)
+                preds, missing = self.cache.lookup(keys, version)
+
+            if missing:
+                new_preds = self._predict(model, preprocessor, X[missing])
+                preds[missing] = new_preds
+                self.cache.store([keys[i] for i in missing], new_preds, version)
+
             return preds
         
         except Exception as e:
             raise CustomException(e, sys)
 
+    def predict_interval(self, features):
+        """
+        (rul, lower, upper) arrays for many rows. Bounds come from the quantile
+        heads, all scored in the same pass as the point RUL on the compiled
+        runtime. When the served version has no heads, lower/upper are None.
+        """
+        try:
+            with time_stage("load_model"):
+                interval_model, preprocessor, layout, version = self.registry.get_interval_path()
+            if interval_model is None:
+                return self.predict(features), None, None
+            X = self._as_rows(features, layout)
+
+            if self.cache is None:
+                return self._predict_interval(interval_model, preprocessor, X)
+
+            # Same cache as point predictions, under their own key prefix
+            with time_stage("cache_lookup"):
+                keys = self.cache.make_keys(X, prefix=b"interval:")
+                values, missing = self.cache.lookup(keys, version, width=3)
+
+            if missing:
+                new_values = np.column_stack(self._predict_interval(interval_model, preprocessor, X[missing]))
+                values[missing] = new_values
+                self.cache.store([keys[i] for i in missing], new_values, version)
+
+            return values[:, 0], values[:, 1], values[:, 2]
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _as_rows(features, layout):
+        if hasattr(features, "columns"):
+            features = features[layout.feature_names].to_numpy(dtype=np.float64)
+        X = np.array(features, dtype=np.float64, ndmin=2)
+        if X.shape[1] != layout.n_features:
+            raise ValueError(f"Expected {layout.n_features} features per row, got {X.shape[1]}")
+        return X
+
+    @staticmethod
+    def _predict_interval(interval_model, preprocessor, features):
+        with time_stage("transform"):
+            data_scaled = preprocessor.transform(features)
+        with time_stage("predict"):
+            return interval_model.predict_interval(data_scaled)
+
+    @staticmethod
+    def _predict(model, preprocessor, features):
+        # Timings go to the stage histograms (/metrics), not the log file
+        # Scale the Input Data
+        with time_stage("transform"):
+            data_scaled = preprocessor.transform(features)
+
+        # Predict
+        with time_stage("predict"):
+            return model.predict(data_scaled)
+
 class CustomData:
     def __init__(self, 
                  s_2: float, s_3: float, s_4: float, 
@@ -49,6 +153,13 @@ class CustomData:
         self.s_20 = s_20
         self.s_21 = s_21
 
+    def get_data_as_array(self, layout=FEATURE_LAYOUT):
+        """
+        Same row as get_data_as_dataframe(), written straight into a NumPy
+        row of the precompiled feature layout (no dict, no DataFrame).
+        """
+        return layout.steady_state_rows([getattr(self, s) for s in INPUT_SENSORS])
+
     def get_data_as_dataframe(self):
         try:
             # We assume "Steady State": The current value represents the recent average.
@@ -102,25 +213,82 @@ class CustomData:
 
             # --- FORCE CORRECT COLUMN ORDER ---
             # Recreate the exact order defined in data_transformation.py
-            
-            # 1. Base Columns
-            ordered_cols = ['setting_1', 'setting_2', 'setting_3'] + [f's_{i}' for i in range(1, 22)]
-            
-            # 2. Rolling Mean & Std
-            sensors = ['s_2', 's_3', 's_4', 's_7', 's_8', 's_9', 's_11', 's_12', 's_13', 's_14', 's_15', 's_17', 's_20', 's_21']
-            for s in sensors:
-                ordered_cols.append(f'{s}_mean')
-                ordered_cols.append(f'{s}_std')
-            
-            # 3. Slopes
-            sensors_slope = ['s_2', 's_3', 's_4', 's_7', 's_11', 's_12', 's_15', 's_17', 's_20', 's_21']
-            for s in sensors_slope:
-                ordered_cols.append(f'{s}_slope')
-
-            # Final Sort
-            df = df[ordered_cols]
+            df = df[FEATURE_COLUMNS]
 
             return df
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+def check_sensor_values(values, row_label):
+    """
+    Rejects rows whose sensor values are not finite numbers: the client did
+    not send a reading there, so it must not be scored on an imputed one.
+    """
+    bad_rows, bad_cols = np.nonzero(~np.isfinite(values))
+    if len(bad_rows):
+        raise ValueError(f"Missing or non-finite sensor {INPUT_SENSORS[bad_cols[0]]} "
+                         f"in {row_label} {bad_rows[0]} ({len(bad_rows)} value(s) in total)")
+
+class CustomBatchData:
+    """
+    Many engines at once (fleet scoring). Rows come from a JSON array of
+    objects or an uploaded CSV, each carrying the same 10 sensors as the form.
+    """
+    def __init__(self, sensor_values, unit_ids=None):
+        # sensor_values: (n_rows, len(INPUT_SENSORS)) float array
+        self.sensor_values = sensor_values
+        self.unit_ids = unit_ids
+
+    @classmethod
+    def from_records(cls, records):
+        if not isinstance(records, list) or len(records) == 0:
+            raise ValueError("Expected a non-empty JSON array of sensor readings")
+        try:
+            values = np.array(
+                [[record[s] for s in INPUT_SENSORS] for record in records], dtype=float)
+        except KeyError as e:
+            raise ValueError(f"Missing sensor {e} in batch record")
+        except (TypeError, ValueError):
+            raise ValueError("Batch records must be objects with numeric sensor values")
+        # null (and "nan"/"inf") would otherwise become NaN and be median-imputed
+        check_sensor_values(values, "batch record")
+
+        unit_ids = None
+        if all("unit_nr" in record for record in records):
+            unit_ids = [validate_unit_id(record["unit_nr"]) for record in records]
+        return cls(values, unit_ids)
+
+    @classmethod
+    def from_csv(cls, file):
+        df = pd.read_csv(file)
+        missing = [s for s in INPUT_SENSORS if s not in df.columns]
+        if missing:
+            raise ValueError(f"Missing sensor columns in CSV: {missing}")
+        if len(df) == 0:
+            raise ValueError("CSV upload contains no rows")
+        try:
+            values = df[INPUT_SENSORS].to_numpy(dtype=float)
+        except ValueError:
+            raise ValueError("CSV sensor columns must be numeric")
+        check_sensor_values(values, "CSV row")
+
+        # Blank ids read as NaN (a float) and are rejected like in JSON
+        unit_ids = [validate_unit_id(u) for u in df["unit_nr"].tolist()] if "unit_nr" in df.columns else None
+        return cls(values, unit_ids)
+
+    def __len__(self):
+        return len(self.sensor_values)
+
+    def get_data_as_array(self, layout=FEATURE_LAYOUT):
+        # Same "Steady State" assumption as CustomData, for every row at once:
+        # raw sensor columns and their rolling means get the reading,
+        # everything else stays 0. One matrix, no per-row dicts.
+        return layout.steady_state_rows(self.sensor_values)
+
+    def get_data_as_dataframe(self):
+        try:
+            return pd.DataFrame(self.get_data_as_array(), columns=FEATURE_COLUMNS)
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,112 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+@dataclass
+class PredictionCacheConfig:
+    max_entries: int = 10000
+    # Entries older than this are recomputed (0 = no expiry)
+    ttl_seconds: float = 300.0
+    # Feature values are rounded to this many decimals before hashing, so
+    # 642.5 and 642.50000001 share an entry (None = exact match only)
+    decimals: int = 4
+
+class PredictionCache:
+    """
+    LRU/TTL cache of predictions keyed on (model version, quantized feature row).
+
+    Rows are canonicalized (rounded, -0.0 folded into 0.0) and hashed as raw
+    bytes. Entries belong to one model version: the first lookup under a new
+    registry version drops the whole cache, so a retrained model.pkl can
+    never serve stale RULs. A key prefix keeps other outputs of the same row
+    (e.g. the (rul, lower, upper) interval) apart from point predictions.
+    """
+    def __init__(self, config=None):
+        self.cache_config = config or PredictionCacheConfig()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+        # --- COUNTERS (exposed through stats()) ---
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_keys(self, X, prefix=b""):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.cache_config.decimals is not None:
+            X = np.round(X, self.cache_config.decimals)
+        X += 0.0
+        return [prefix + row.tobytes() for row in X]
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, keys, version, width=None):
+        """
+        Returns (values, missing): cached predictions (NaN where absent)
+        and the positions that still have to be predicted. With `width`,
+        every entry is a row of that many values.
+        """
+        shape = len(keys) if width is None else (len(keys), width)
+        values = np.full(shape, np.nan, dtype=np.float32)
+        missing = []
+        now = time.monotonic()
+        ttl = self.cache_config.ttl_seconds
+
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and ttl and now - entry[1] > ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = entry[0]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        return values, missing
+
+    def store(self, keys, values, version):
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.cache_config.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.cache_config.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
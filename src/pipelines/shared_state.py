@@ -0,0 +1,125 @@
+"""
+Engine state shared by every web worker process.
+
+Stateful objects (the stream windows, the fleet index) must see every
+request, but gunicorn spreads requests over several worker processes. The
+gunicorn master therefore starts one state-server process that owns them
+(start_state_server, called from gunicorn.conf.py), and workers call their
+methods through multiprocessing proxies. Without a server (python app.py,
+scripts) the same objects are plain in-process instances.
+Standard library only.
+"""
+import os
+import sys
+import signal
+import secrets
+import threading
+import multiprocessing
+from multiprocessing.managers import BaseManager
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Set by start_state_server in the master, inherited by forked workers
+ADDRESS_ENV = "ENGINE_STATE_ADDRESS"
+AUTHKEY_ENV = "ENGINE_STATE_AUTHKEY"
+
+# name -> (factory, config) of every SharedObject, built by the server
+_SPECS = {}
+# The objects themselves, inside the state-server process only
+_INSTANCES = {}
+_manager = None
+
+class _StateManager(BaseManager):
+    pass
+
+class _InstanceGetter:
+    # Registered callable: every worker gets a proxy to the same instance
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self):
+        return _INSTANCES[self.name]
+
+def _init_server(specs):
+    # Runs first in the state server. Ctrl-C reaches the whole process group:
+    # the gunicorn master handles it and shuts this server down (on_exit)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name, (factory, config) in specs.items():
+        _INSTANCES[name] = factory(config)
+
+class SharedObject:
+    """
+    Handle on one piece of engine state. Resolves once per process (threads
+    and sockets do not survive a fork) to a proxy on the state server when
+    ENGINE_STATE_ADDRESS is set, else to a local `factory(config)`.
+    Attribute access is forwarded, so callers use it like the object itself;
+    through a proxy only methods work, so keep the state behind methods.
+    """
+    def __init__(self, name, factory, config=None):
+        self.name = name
+        self._target = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._factory = factory
+        self._config = config
+        _SPECS[name] = (factory, config)
+        _StateManager.register(name, callable=_InstanceGetter(name))
+
+    def _resolve(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    address = os.environ.get(ADDRESS_ENV)
+                    if address:
+                        manager = _StateManager(address=address, authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+                        manager.connect()
+                        self._target = getattr(manager, self.name)()
+                    else:
+                        self._target = self._factory(self._config)
+                    self._pid = os.getpid()
+        return self._target
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+def start_state_server():
+    """
+    Starts the state-server process holding every SharedObject created so
+    far and exports its address, so processes forked afterwards (gunicorn
+    workers) connect to it. Call it in the gunicorn master before forking.
+    """
+    global _manager
+    try:
+        authkey = secrets.token_bytes(32)
+        manager = _StateManager(address=None, authkey=authkey)
+        manager.start(initializer=_init_server, initargs=(_SPECS,))
+        _manager = manager
+
+        os.environ[ADDRESS_ENV] = _manager.address
+        os.environ[AUTHKEY_ENV] = authkey.hex()
+        logging.info(f"Engine state server for {sorted(_SPECS)} listening at {_manager.address}")
+        return _manager
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def stop_state_server():
+    global _manager
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+        os.environ.pop(ADDRESS_ENV, None)
+        os.environ.pop(AUTHKEY_ENV, None)
+
+def _forget_server_in_child():
+    # gunicorn forks workers with os.fork, so they inherit the master's
+    # manager, its exit hook and its child-process entry: drop all three, only
+    # the master may stop (and join) the server
+    global _manager
+    if _manager is not None:
+        _manager.shutdown.cancel()
+        multiprocessing.process._children.discard(_manager._process)
+        _manager = None
+
+os.register_at_fork(after_in_child=_forget_server_in_child)
@@ -0,0 +1,204 @@
+import os
+import sys
+import ast
+import json
+import time
+import shutil
+import hashlib
+import importlib
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+
+ENTRY_FILE = "entry.json"
+
+@dataclass
+class StageCacheConfig:
+    cache_dir: str = os.path.join("artifacts", "stage_cache")
+    # Least recently used entries are evicted beyond either limit
+    max_size_bytes: int = 2 * 1024 ** 3
+    max_entries: int = 20
+
+def _config_dict(config):
+    """
+    Every public setting of a stage config, including the class-level
+    defaults that dataclasses.asdict() skips (un-annotated attributes).
+    """
+    values = {}
+    for cls in reversed(type(config).__mro__):
+        values.update({k: v for k, v in vars(cls).items() if not k.startswith("_") and not callable(v)})
+    values.update({k: v for k, v in vars(config).items() if not k.startswith("_")})
+    return values
+
+def _code_modules(module_name):
+    """
+    The module plus every src.* module it imports, transitively. Import
+    statements anywhere in a file count, including function-level ones.
+    """
+    seen, pending = set(), [module_name]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(sys.modules[name].__file__, "rb") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                candidates = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                # `from src.x import y`: y may be a submodule or just a name
+                candidates = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for candidate in candidates:
+                if candidate.split(".")[0] != "src" or candidate in seen:
+                    continue
+                try:
+                    importlib.import_module(candidate)
+                except ImportError:
+                    continue
+                pending.append(candidate)
+    return sorted(seen)
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+def _copy(src, dst):
+    if os.path.isdir(dst):
+        shutil.rmtree(dst)
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        # Swapped in, not overwritten: the web workers may have dst memory-mapped
+        shutil.copy2(src, dst + ".tmp")
+        os.replace(dst + ".tmp", dst)
+
+class StageCache:
+    """
+    Content-addressed cache for train_pipeline.py stages.
+
+    A stage's key hashes its input files (content, not mtime), its config,
+    the source of its module and of every src module that module imports
+    (transitively), and any extra values. On a hit the stage's output
+    files are copied back into place instead of being recomputed.
+    Layout: <cache_dir>/<stage>/<key>/{entry.json, output files...}
+    """
+    def __init__(self, config=None):
+        self.cache_config = config or StageCacheConfig()
+
+    def compute_key(self, stage_name, input_paths=(), config=None, code=None, extra=None):
+        try:
+            sha = hashlib.sha256()
+            sha.update(stage_name.encode())
+
+            for path in input_paths:
+                files = [path]
+                if os.path.isdir(path):
+                    files = sorted(
+                        os.path.join(root, name)
+                        for root, _, names in os.walk(path) for name in names
+                    )
+                for file_path in files:
+                    sha.update(os.path.relpath(file_path, path).encode())
+                    with open(file_path, "rb") as f:
+                        for block in iter(lambda: f.read(1 << 20), b""):
+                            sha.update(block)
+
+            if config is not None:
+                sha.update(json.dumps(_config_dict(config), sort_keys=True, default=str).encode())
+            if code is not None:
+                # Editing the stage's code, or any src module it imports
+                # (feature schema, artifact store, ...), invalidates its entries
+                for module_name in _code_modules(code.__module__):
+                    sha.update(module_name.encode())
+                    with open(sys.modules[module_name].__file__, "rb") as f:
+                        sha.update(f.read())
+            if extra is not None:
+                sha.update(json.dumps(extra, sort_keys=True, default=str).encode())
+
+            return sha.hexdigest()[:16]
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _entry_dir(self, stage_name, key):
+        return os.path.join(self.cache_config.cache_dir, stage_name, key)
+
+    def run(self, stage_name, key, outputs, compute, force=False):
+        """
+        Returns the stage result from cache, or runs `compute()` and caches it.
+        `outputs` maps a name to each file/directory the stage writes;
+        `compute` must return something JSON-serializable.
+        """
+        try:
+            entry_dir = self._entry_dir(stage_name, key)
+            entry_file = os.path.join(entry_dir, ENTRY_FILE)
+
+            if not force and os.path.exists(entry_file):
+                with open(entry_file) as f:
+                    entry = json.load(f)
+                for name, path in outputs.items():
+                    _copy(os.path.join(entry_dir, name), path)
+                # Touch for LRU eviction
+                os.utime(entry_file)
+                print(f"[cache] {stage_name}: hit ({key})")
+                logging.info(f"Stage cache hit for {stage_name} ({key})")
+                return entry["result"]
+
+            print(f"[cache] {stage_name}: {'forced' if force else 'miss'} ({key}), running stage")
+            start = time.perf_counter()
+            result = compute()
+            elapsed = time.perf_counter() - start
+
+            # --- SNAPSHOT THE OUTPUTS ---
+            tmp_dir = entry_dir + ".partial"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            for name, path in outputs.items():
+                _copy(path, os.path.join(tmp_dir, name))
+            with open(os.path.join(tmp_dir, ENTRY_FILE), "w") as f:
+                json.dump({"stage": stage_name, "key": key, "seconds": elapsed, "result": result}, f, indent=2)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(tmp_dir, entry_dir)
+            logging.info(f"Stage {stage_name} ran in {elapsed:.2f}s, cached as {key}")
+
+            self.evict(keep=entry_dir)
+            return result
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def evict(self, keep=None):
+        """
+        Drops least recently used entries until the cache fits its limits.
+        """
+        root = self.cache_config.cache_dir
+        entries = []
+        for stage_name in os.listdir(root):
+            stage_dir = os.path.join(root, stage_name)
+            for key in os.listdir(stage_dir):
+                entry_dir = os.path.join(stage_dir, key)
+                entry_file = os.path.join(entry_dir, ENTRY_FILE)
+                if os.path.exists(entry_file):
+                    entries.append((os.path.getmtime(entry_file), entry_dir, _path_size(entry_dir)))
+
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        count = len(entries)
+        for _, entry_dir, size in entries:
+            if total <= self.cache_config.max_size_bytes and count <= self.cache_config.max_entries:
+                break
+            if entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            count -= 1
+            logging.info(f"Evicted stage cache entry {entry_dir}")
@@ -0,0 +1,196 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.components.feature_schema import (
+    SENSORS, SLOPE_SENSORS, ROLLING_WINDOW, BASE_COLUMNS, FEATURE_COLUMNS
+)
+from src.pipelines.predict_pipeline import PredictPipeline, get_health_status_array, validate_unit_id
+
+@dataclass
+class StreamPipelineConfig:
+    # Hard cap on engines kept in memory; the least recently updated one is evicted
+    max_units: int = 50000
+    # Engines silent for longer than this are dropped as well (0 = never)
+    idle_timeout_seconds: float = 6 * 3600
+
+class EngineWindowStore:
+    """
+    Last ROLLING_WINDOW + 1 cycles of the trending sensors for every live engine.
+
+    All histories live in one preallocated slab (max_units x 6 x n_sensors),
+    so memory is fixed up front no matter how many engines report. Each engine
+    owns a slot used as a ring buffer; an OrderedDict keeps slots in LRU order.
+    We keep 6 cycles, not 5, because the slope feature is x[t] - x[t-5].
+    Callers go through update_many()/stats() only, so the store also works
+    as one shared instance behind a proxy (see src/pipelines/shared_state.py).
+    """
+    def __init__(self, config=None):
+        self.stream_config = config or StreamPipelineConfig()
+        max_units = self.stream_config.max_units
+        self.depth = ROLLING_WINDOW + 1
+
+        self._history = np.zeros((max_units, self.depth, len(SENSORS)))
+        self._head = np.zeros(max_units, dtype=np.int64)      # next write position
+        self._count = np.zeros(max_units, dtype=np.int64)     # cycles seen
+        self._last_seen = np.zeros(max_units)
+
+        self._slots = OrderedDict()                           # unit_nr -> slot
+        self._lock = threading.Lock()
+        self._free_slots = list(range(max_units - 1, -1, -1))
+        self.evictions = 0
+
+        # Where each sensor's features go in the model's input row
+        col_index = {col: i for i, col in enumerate(FEATURE_COLUMNS)}
+        self._base_idx = np.array([col_index[c] for c in BASE_COLUMNS])
+        self._sensor_idx = np.array([BASE_COLUMNS.index(s) for s in SENSORS])
+        self._mean_idx = np.array([col_index[f'{s}_mean'] for s in SENSORS])
+        self._std_idx = np.array([col_index[f'{s}_std'] for s in SENSORS])
+        self._slope_src = np.array([SENSORS.index(s) for s in SLOPE_SENSORS])
+        self._slope_idx = np.array([col_index[f'{s}_slope'] for s in SLOPE_SENSORS])
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _evict_idle(self, now):
+        timeout = self.stream_config.idle_timeout_seconds
+        if not timeout:
+            return
+        # OrderedDict is in LRU order: stop at the first unit that is still fresh
+        while self._slots:
+            unit, slot = next(iter(self._slots.items()))
+            if now - self._last_seen[slot] <= timeout:
+                break
+            self._release(unit)
+
+    def _release(self, unit):
+        slot = self._slots.pop(unit)
+        self._free_slots.append(slot)
+        self.evictions += 1
+
+    def _slot_for(self, unit):
+        slot = self._slots.get(unit)
+        if slot is not None:
+            self._slots.move_to_end(unit)
+            return slot
+
+        if not self._free_slots:
+            # Full: evict the least recently updated engine
+            self._release(next(iter(self._slots)))
+
+        slot = self._free_slots.pop()
+        self._head[slot] = 0
+        self._count[slot] = 0
+        self._slots[unit] = slot
+        return slot
+
+    def update(self, unit, base_values, out_row, now=None):
+        """
+        Push one cycle (BASE_COLUMNS order) for `unit` and write the full model
+        input row (FEATURE_COLUMNS order) into `out_row`. Constant work per call.
+        Returns the number of cycles seen for this engine.
+        """
+        now = time.time() if now is None else now
+        self._evict_idle(now)
+        slot = self._slot_for(unit)
+
+        # --- PUSH INTO THE RING BUFFER ---
+        head = self._head[slot]
+        buffer = self._history[slot]
+        buffer[head] = base_values[self._sensor_idx]
+        self._head[slot] = (head + 1) % self.depth
+        self._count[slot] += 1
+        self._last_seen[slot] = now
+        count = self._count[slot]
+
+        # Newest first: positions head, head-1, ... wrapped around
+        order = (head - np.arange(self.depth)) % self.depth
+
+        # --- SAME FEATURES AS DataTransformation.add_features ---
+        # Rolling/diff NaNs are filled with 0 in training, so do the same here.
+        out_row[:] = 0
+        out_row[self._base_idx] = base_values
+        if count >= ROLLING_WINDOW:
+            window = buffer[order[:ROLLING_WINDOW]]
+            out_row[self._mean_idx] = window.mean(axis=0)
+            out_row[self._std_idx] = window.std(axis=0, ddof=1)
+        if count > ROLLING_WINDOW:
+            lagged = buffer[order[ROLLING_WINDOW]]
+            out_row[self._slope_idx] = (buffer[head] - lagged)[self._slope_src]
+
+        return int(count)
+
+    def update_many(self, units, values, now=None):
+        """
+        update() for one reading per unit, atomically: returns the model input
+        rows (FEATURE_COLUMNS order) and the cycles seen for every unit.
+        """
+        features = np.empty((len(units), len(FEATURE_COLUMNS)))
+        cycles = []
+        with self._lock:
+            now = time.time() if now is None else now
+            for i, unit in enumerate(units):
+                cycles.append(self.update(unit, values[i], features[i], now))
+        return features, cycles
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active_units": len(self._slots),
+                "max_units": self.stream_config.max_units,
+                "evictions": self.evictions,
+                "buffer_bytes": self._history.nbytes,
+            }
+
+class StreamPipeline:
+    """
+    Streaming mode: telemetry arrives one cycle per engine, features are
+    computed from the per-engine window and scored in one predict call.
+    """
+    def __init__(self, config=None, predict_pipeline=None, windows=None):
+        # `windows`: an EngineWindowStore, or a SharedObject handle on the one
+        # every gunicorn worker shares (app.py)
+        self.windows = windows if windows is not None else EngineWindowStore(config)
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+
+    @staticmethod
+    def parse_readings(payload):
+        """
+        Accepts one reading object or a list of them. Each needs `unit_nr`;
+        settings/sensors that are not sent are treated as 0, like CustomData.
+        """
+        readings = payload if isinstance(payload, list) else [payload]
+        if len(readings) == 0 or not all(isinstance(r, dict) for r in readings):
+            raise ValueError("Expected a reading object or a non-empty array of them")
+
+        units = []
+        values = np.zeros((len(readings), len(BASE_COLUMNS)))
+        for i, reading in enumerate(readings):
+            if "unit_nr" not in reading:
+                raise ValueError("Every streaming reading needs a unit_nr")
+            units.append(validate_unit_id(reading["unit_nr"]))
+            try:
+                values[i] = [float(reading.get(col, 0)) for col in BASE_COLUMNS]
+            except (TypeError, ValueError):
+                raise ValueError(f"Non-numeric sensor value for unit {reading['unit_nr']}")
+        return units, values
+
+    def update_and_predict(self, units, values):
+        try:
+            features, cycles = self.windows.update_many(units, values)
+
+            logging.info(f"Scoring {len(units)} streaming readings")
+            preds = self.predict_pipeline.predict(features).astype(float).round(2)
+            return preds, cycles, get_health_status_array(preds)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def stats(self):
+        return self.windows.stats()
@@ -1,17 +1,202 @@
+import os
+import argparse
+
+import numpy as np
+
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.components.model_exporter import ModelExporter
+from src.components.model_versions import ModelVersionStore
+from src.pipelines.stage_cache import StageCache
 
-if __name__ == "__main__":
-    # 1. Run Data Ingestion (Raw -> Train/Test CSVs)
-    obj = DataIngestion()
-    train_data, test_data = obj.initiate_data_ingestion()
+# Every stage below is keyed on (input content, config, stage code): when
+# nothing changed its outputs are restored from artifacts/stage_cache/.
+
+def run_data_ingestion(cache, force=False):
+    ingestion = DataIngestion()
+    key = cache.compute_key("data_ingestion", ingestion.get_raw_files(),
+                            ingestion.ingestion_config, code=DataIngestion)
+
+    def compute():
+        train_data, test_data = ingestion.initiate_data_ingestion()
+        return [train_data, test_data]
+
+    return cache.run("data_ingestion", key, ingestion.get_output_paths(), compute, force)
 
-    # 2. Run Data Transformation (CSVs -> Arrays + Preprocessor.pkl)
+def run_data_transformation(cache, train_data, test_data, force=False):
     data_transformation = DataTransformation()
-    train_arr, test_arr, _ = data_transformation.initiate_data_transformation(train_data, test_data)
+    config = data_transformation.data_transformation_config
+    key = cache.compute_key("data_transformation", [train_data, test_data],
+                            config, code=DataTransformation)
+    outputs = {
+        "preprocessor.pkl": config.preprocessor_obj_file_path,
+        "train_groups.npy": config.train_groups_file_path,
+        "train_arr.npy": config.train_arr_file_path,
+        "test_arr.npy": config.test_arr_file_path,
+    }
 
-    # 3. Run Model Trainer (Arrays -> Model.pkl)
+    def compute():
+        data_transformation.initiate_data_transformation(train_data, test_data)
+        return None
+
+    cache.run("data_transformation", key, outputs, compute, force)
+    return config
+
+def run_chunked_transformation(cache, train_data, test_data, force=False):
+    data_transformation = DataTransformation()
+    config = data_transformation.data_transformation_config
+    key = cache.compute_key("chunked_transformation", [train_data, test_data],
+                            config, code=DataTransformation)
+    outputs = {
+        "preprocessor.pkl": config.preprocessor_obj_file_path,
+        "train_groups.npy": config.train_groups_file_path,
+        "train_features.npy": config.train_features_file_path,
+        "train_target.npy": config.train_target_file_path,
+        "test_features.npy": config.test_features_file_path,
+        "test_target.npy": config.test_target_file_path,
+    }
+
+    def compute():
+        data_transformation.initiate_chunked_transformation(train_data, test_data)
+        return None
+
+    cache.run("chunked_transformation", key, outputs, compute, force)
+    return config
+
+def run_hyperparameter_search(cache, transformation_config, force=False):
+    model_trainer = ModelTrainer()
+    config = model_trainer.model_trainer_config
+    inputs = [transformation_config.train_arr_file_path, transformation_config.train_groups_file_path]
+    key = cache.compute_key("hyperparameter_search", inputs, config, code=ModelTrainer)
+
+    def compute():
+        train_arr = np.load(transformation_config.train_arr_file_path)
+        groups = np.load(transformation_config.train_groups_file_path)
+        return model_trainer.initiate_hyperparameter_search(train_arr, groups)
+
+    outputs = {"search_results.json": config.search_results_file_path}
+    return cache.run("hyperparameter_search", key, outputs, compute, force)
+
+def run_model_trainer(cache, transformation_config, model_params=None, force=False):
     model_trainer = ModelTrainer()
+    config = model_trainer.model_trainer_config
+    inputs = [transformation_config.train_arr_file_path, transformation_config.test_arr_file_path]
+    key = cache.compute_key("model_trainer", inputs, config, code=ModelTrainer,
+                            extra={"model_params": model_params})
+
+    def compute():
+        train_arr = np.load(transformation_config.train_arr_file_path)
+        test_arr = np.load(transformation_config.test_arr_file_path)
+        return float(model_trainer.initiate_model_trainer(train_arr, test_arr, model_params=model_params))
+
+    outputs = {"model.pkl": config.trained_model_file_path}
+    return cache.run("model_trainer", key, outputs, compute, force)
+
+def run_interval_trainer(cache, transformation_config, model_params=None, force=False):
+    model_trainer = ModelTrainer()
+    config = model_trainer.model_trainer_config
+    inputs = [transformation_config.train_arr_file_path, transformation_config.test_arr_file_path]
+    key = cache.compute_key("interval_trainer", inputs, config, code=ModelTrainer,
+                            extra={"model_params": model_params})
+
+    def compute():
+        train_arr = np.load(transformation_config.train_arr_file_path)
+        test_arr = np.load(transformation_config.test_arr_file_path)
+        return float(model_trainer.initiate_interval_trainer(train_arr, test_arr, model_params=model_params))
+
+    outputs = {"interval_model.pkl": config.interval_model_file_path}
+    return cache.run("interval_trainer", key, outputs, compute, force)
+
+def remove_interval_model():
+    # Quantile heads from an earlier run would not match the new point model
+    path = ModelTrainer().model_trainer_config.interval_model_file_path
+    if os.path.exists(path):
+        os.remove(path)
+
+def run_external_memory_trainer(cache, transformation_config, model_params=None, force=False):
+    model_trainer = ModelTrainer()
+    config = model_trainer.model_trainer_config
+    train_paths = (transformation_config.train_features_file_path, transformation_config.train_target_file_path)
+    test_paths = (transformation_config.test_features_file_path, transformation_config.test_target_file_path)
+    key = cache.compute_key("external_memory_trainer", [*train_paths, *test_paths], config,
+                            code=ModelTrainer, extra={"model_params": model_params})
+
+    def compute():
+        return float(model_trainer.initiate_external_memory_training(
+            train_paths, test_paths, model_params=model_params))
+
+    outputs = {"model.pkl": config.trained_model_file_path}
+    return cache.run("external_memory_trainer", key, outputs, compute, force)
+
+def run_model_exporter(cache, force=False):
+    exporter = ModelExporter()
+    config = exporter.model_exporter_config
+    inputs = [config.model_file_path, config.preprocessor_file_path]
+    if os.path.exists(config.interval_model_file_path):
+        inputs.append(config.interval_model_file_path)
+    key = cache.compute_key("model_exporter", inputs, config, code=ModelExporter)
+
+    def compute():
+        exporter.initiate_model_export()
+        return None
+
+    cache.run("model_exporter", key, {"compiled_model": config.compiled_model_dir}, compute, force)
+
+def run_model_publish():
+    # Not cached: the version id is a content hash, so republishing the same
+    # artifacts only moves CURRENT back to them (needed after an incremental update)
+    config = ModelExporter().model_exporter_config
+    return ModelVersionStore().publish(config.model_file_path, config.preprocessor_file_path,
+                                       config.compiled_model_dir, metadata={"source": "train_pipeline"},
+                                       interval_model_file_path=config.interval_model_file_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the engine RUL model")
+    parser.add_argument("--search", action="store_true",
+                        help="tune XGBoost with grouped CV before the final fit")
+    parser.add_argument("--force", action="store_true",
+                        help="rerun every stage even if a cached result matches")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="chunked features + XGBoost external memory, for data larger than RAM")
+    parser.add_argument("--no-intervals", action="store_true",
+                        help="skip the quantile model behind the lower/upper RUL bounds")
+    args = parser.parse_args()
+    if args.search and args.out_of_core:
+        parser.error("--search needs the in-memory arrays; run it without --out-of-core")
+
+    cache = StageCache()
+
+    # 1. Run Data Ingestion (Raw -> Train/Test artifacts)
+    train_data, test_data = run_data_ingestion(cache, args.force)
+
+    # 2. Run Data Transformation (Artifacts -> Arrays + Preprocessor.pkl)
+    if args.out_of_core:
+        transformation_config = run_chunked_transformation(cache, train_data, test_data, args.force)
+    else:
+        transformation_config = run_data_transformation(cache, train_data, test_data, args.force)
+
+    # 3. Run Model Trainer (Arrays -> Model.pkl)
+    model_params = None
+    if args.search:
+        print("Searching hyperparameters...")
+        model_params = run_hyperparameter_search(cache, transformation_config, args.force)
+
     print("Training Model...")
-    model_trainer.initiate_model_trainer(train_arr, test_arr)
\ No newline at end of file
+    if args.out_of_core:
+        run_external_memory_trainer(cache, transformation_config, model_params, args.force)
+    else:
+        run_model_trainer(cache, transformation_config, model_params, args.force)
+
+    # Quantile heads for RUL intervals (in-memory arrays only)
+    if args.no_intervals or args.out_of_core:
+        remove_interval_model()
+    else:
+        print("Training Interval Model...")
+        run_interval_trainer(cache, transformation_config, model_params, args.force)
+
+    # 4. Compile Model (+ quantile heads) + Preprocessor for the NumPy serving runtime (parity-checked)
+    run_model_exporter(cache, args.force)
+
+    # 5. Publish as the served version (artifacts/models/CURRENT)
+    print(f"Published model version {run_model_publish()}")
@@ -0,0 +1,72 @@
+"""
+Sampling profiler for single requests (see the ?profile=1 hook in app.py).
+Writes "folded" stacks: one `frame;frame;frame count` line per unique stack,
+the input format of flamegraph.pl and speedscope.
+"""
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+@dataclass
+class ProfilerConfig:
+    output_dir: str = os.path.join("artifacts", "profiles")
+    interval_seconds: float = 0.001
+
+class SamplingProfiler:
+    """
+    Snapshots the Python stack of one thread (the one that called start(),
+    i.e. the profiled request) at a fixed interval. Other threads are left
+    out: on gthread workers they serve concurrent requests. Work handed off
+    to the micro-batch worker shows up as the request thread waiting on it.
+    Stacks are rooted at the thread name.
+    """
+    def __init__(self, config=None):
+        self.profiler_config = config or ProfilerConfig()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.thread_id = None
+        self.thread_name = None
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.profiler_config.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(self.thread_name)
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, name):
+        os.makedirs(self.profiler_config.output_dir, exist_ok=True)
+        path = os.path.join(self.profiler_config.output_dir,
+                            f"{name}_{os.getpid()}_{time.time_ns()}.folded")
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
@@ -1,5 +1,6 @@
 import os
 import sys
+import hashlib
 import pandas as pd
 import joblib
 from src.exception import CustomException
@@ -12,17 +13,49 @@ def save_object(file_path, obj):
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
 
-        joblib.dump(obj, file_path)
+        # Write aside and swap in: serving processes may have the old file
+        # memory-mapped, and must never see it truncated or half-written
+        tmp_path = file_path + ".tmp"
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, file_path)
 
     except Exception as e:
         raise CustomException(e, sys)
 
-def load_object(file_path):
+def load_object(file_path, mmap_mode=None):
     """
     Standard function to load a pickle file.
+    With mmap_mode='r', NumPy arrays inside it are memory-mapped read-only
+    (shared between processes) instead of copied into each one.
     """
     try:
-        return joblib.load(file_path)
+        return joblib.load(file_path, mmap_mode=mmap_mode)
 
     except Exception as e:
-        raise CustomException(e, sys)
\ No newline at end of file
+        raise CustomException(e, sys)
+
+def get_file_hash(*file_paths):
+    """
+    Short content hash of one or more files (used as the model version).
+    """
+    try:
+        sha = hashlib.sha256()
+        for file_path in file_paths:
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+        return sha.hexdigest()[:12]
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def get_model_version(model_file_path, preprocessor_file_path, interval_model_file_path=None):
+    """
+    Model version: content hash of the pickles served together. The quantile
+    interval model only counts when it exists, so models trained without
+    one keep their version.
+    """
+    paths = [model_file_path, preprocessor_file_path]
+    if interval_model_file_path and os.path.exists(interval_model_file_path):
+        paths.append(interval_model_file_path)
+    return get_file_hash(*paths)